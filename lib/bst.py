@@ -1,6 +1,8 @@
 """A binary tree ordered by key."""
 
-from typing import Optional, Protocol
+# pylint: disable=too-many-lines
+
+from typing import Iterable, Iterator, Protocol, Sequence, TypeVar
 
 
 class Comparable(Protocol):
@@ -15,6 +17,56 @@ class Comparable(Protocol):
         raise NotImplementedError
 
 
+# A key-value pair.
+Pair = tuple[Comparable, object]
+# The class of the tree created by a class method.
+Tree = TypeVar("Tree", bound="BinarySearchTree")
+
+
+class _Node:  # pylint: disable=too-few-public-methods
+    # A node of a binary search tree, i.e. the root of a non-empty subtree.
+    # Besides the key-value pair and the two subtrees, a node stores
+    # the size and the height of its subtree, for the trees that need them.
+    # Declaring the slots avoids creating a dictionary for each node.
+    __slots__ = ("key", "value", "left", "right", "size", "height")
+    key: Comparable
+    value: object
+    left: "_Node"
+    right: "_Node"
+    size: int
+    height: int
+
+    def __init__(self, key: Comparable, value: object) -> None:
+        # Create a node with empty subtrees.
+        self.key = key
+        self.value = value
+        self.left = _EMPTY
+        self.right = _EMPTY
+        self.size = 1
+        self.height = 1
+
+    def copy(self) -> "_Node":
+        """Return a new node with the same pair, subtrees, size and height."""
+        node = _Node(self.key, self.value)
+        node.left = self.left
+        node.right = self.right
+        node.size = self.size
+        node.height = self.height
+        return node
+
+
+# The empty tree is a single node shared by all trees.
+# It has no key, it has size and height 0, and its subtrees are itself.
+# So the size and height of any subtree can be used without checking
+# whether the subtree is empty.
+_EMPTY = _Node.__new__(_Node)
+_EMPTY.value = None
+_EMPTY.left = _EMPTY
+_EMPTY.right = _EMPTY
+_EMPTY.size = 0
+_EMPTY.height = 0
+
+
 class BinarySearchTree:
     """
     Provide a collection of key-value pairs with unique and comparable keys.
@@ -29,44 +81,107 @@ class BinarySearchTree:
     - every key in the right subtree is larger than the root's key.
     """
 
-    # Creator
-    # -------
+    # Representation
+    # --------------
+    # A tree is represented by its root node. Each node keeps the number of
+    # nodes in its subtree, to quickly compute ranks.
+    # The methods go down the tree with loops, instead of recursion,
+    # so that they work for trees deeper than Python's recursion limit.
+    # The class methods access the root of the new tree.
+    # pylint: disable=protected-access,too-many-public-methods
+
+    __slots__ = ("_root",)
+
+    # Whether every tree of this class has height O(log n).
+    # Only then is looking up keys in a tree of this class fast.
+    _balanced = False
+
+    # Creators
+    # --------
 
     def __init__(self) -> None:
         """Initialise the tree to be empty."""
-        # Invariant: all fields are None (empty tree) or no field is None.
-        self._key: Optional[Comparable] = None
-        self._value: object = None
-        self._left: Optional["BinarySearchTree"] = None
-        self._right: Optional["BinarySearchTree"] = None
+        self._root = _EMPTY
+
+    # The following creators build a balanced tree from many pairs at once,
+    # which is faster than adding the pairs one by one.
+
+    @classmethod
+    def from_sorted(cls: type[Tree], pairs: Sequence[Pair]) -> Tree:
+        """Return a new tree with the given key-value pairs.
+
+        Assume the pairs are in ascending order of key and
+        the keys are unique. Assume no value is None.
+        The tree is as balanced as possible and
+        is built in linear time.
+        """
+        tree = cls()
+        tree._root = tree._build(pairs, 0, len(pairs))
+        return tree
+
+    @classmethod
+    def from_pairs(cls: type[Tree], pairs: Iterable[Pair]) -> Tree:
+        """Return a new tree with the given key-value pairs.
+
+        The pairs can be in any order. If several pairs have the same key,
+        the last pair is used, as if the pairs were added one by one.
+        Assume no value is None.
+        The tree is as balanced as possible.
+        """
+        # Sorting is stable, so pairs with the same key keep their order.
+        ordered = sorted(pairs, key=lambda pair: pair[0])
+        unique: list[Pair] = []
+        for pair in ordered:
+            if unique and unique[-1][0] == pair[0]:
+                unique[-1] = pair
+            else:
+                unique.append(pair)
+        return cls.from_sorted(unique)
+
+    def _build(self, pairs: Sequence[Pair], start: int, end: int) -> _Node:
+        # Return the root of a subtree with pairs[start:end], putting the
+        # middle pair in the root. The recursion depth is logarithmic.
+        if start == end:
+            return _EMPTY
+        middle = (start + end) // 2
+        key, value = pairs[middle]
+        assert value is not None
+        node = _Node(key, value)
+        node.left = self._build(pairs, start, middle)
+        node.right = self._build(pairs, middle + 1, end)
+        self._update(node)
+        return node
 
     # Inspectors
     # ----------
 
     def is_empty(self) -> bool:
         """Return True if the tree is empty, otherwise False."""
-        return self._key is None
+        return self._root is _EMPTY
+
+    def __len__(self) -> int:
+        """Implement the `len` function for binary search trees.
+
+        Return the number of nodes in the tree.
+        """
+        return self._root.size
 
     def value(self, the_key: Comparable) -> object:
         """Return the value associated to the_key in the tree.
 
         Return None if the tree hasn't the_key.
         """
-        # Base case: the tree is empty.
-        if self.is_empty():
-            return None
-        # tell the type checker that the tree isn't empty
-        assert self._key is not None
-        assert self._left is not None and self._right is not None
-        # Base case: the key is in the root.
-        if the_key == self._key:
-            return self._value
-        # Reduction step: choose the appropriate subtree.
-        # Recursive step: get the value in that subtree.
-        # Inductive step: not needed.
-        if the_key < self._key:
-            return self._left.value(the_key)
-        return self._right.value(the_key)
+        node = self._root
+        # Go down the tree until finding the key or an empty subtree.
+        while node is not _EMPTY:
+            if the_key == node.key:
+                return node.value
+            # Choose the appropriate subtree.
+            if the_key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return None
 
     def __contains__(self, the_key: Comparable) -> bool:
         """Implement the `in` operator for binary search trees.
@@ -80,73 +195,375 @@ class BinarySearchTree:
 
         The root is in level 1, its children in level 2, etc.
         """
-        # Base case: the empty tree.
-        if self.is_empty():
-            return 0
-        assert self._left is not None and self._right is not None
-        # Reduction step: consider both subtrees.
-        # Recursive step: find their height.
-        left_height = self._left.height()
-        right_height = self._right.height()
-        # Inductive step: take the maximal height, add 1 edge from the root.
-        return max(left_height, right_height) + 1
+        highest = 0
+        # Keep the nodes yet to visit, and their level, in a stack.
+        to_visit = [(self._root, 1)]
+        while to_visit:
+            node, level = to_visit.pop()
+            if node is not _EMPTY:
+                highest = max(highest, level)
+                to_visit.append((node.left, level + 1))
+                to_visit.append((node.right, level + 1))
+        return highest
 
     def in_order(self) -> list[object]:
         """Do an in-order traversal of the tree.
 
         Return a list of the keys in the tree, in the order visited.
         """
-        # Base case: the empty tree.
-        if self.is_empty():
-            return []
-        assert self._left is not None and self._right is not None
-        # Reduction step: consider each subtree.
-        # Recursive step: traverse each subtree.
-        left_keys = self._left.in_order()
-        right_keys = self._right.in_order()
-        # Inductive step: put the keys in the right order
-        return left_keys + [self._key] + right_keys
+        return list(self.iter_in_order())
 
     def pre_order(self) -> list[object]:
         """Do a pre-order traversal of the tree.
 
         Return a list of the keys in the tree, in the order visited.
         """
-        if self.is_empty():
-            return []
-        assert self._left is not None and self._right is not None
-        left_keys = self._left.pre_order()
-        right_keys = self._right.pre_order()
-        return [self._key] + left_keys + right_keys
+        return list(self.iter_pre_order())
 
     def post_order(self) -> list[object]:
         """Do a post-order traversal of the tree.
 
         Return a list of the keys in the tree, in the order visited.
         """
-        if self.is_empty():
-            return []
-        assert self._left is not None and self._right is not None
-        left_keys = self._left.post_order()
-        right_keys = self._right.post_order()
-        return left_keys + right_keys + [self._key]
+        return list(self.iter_post_order())
+
+    # The following generators visit one node at a time, on demand,
+    # using memory proportional to the height of the tree, not its size.
+    # The tree must not be changed while a traversal is under way.
+
+    def iter_in_order(self) -> Iterator[object]:
+        """Do an in-order traversal of the tree.
+
+        Generate the keys in the tree, in the order visited.
+        """
+        for node in self._in_order_nodes():
+            yield node.key
+
+    def __iter__(self) -> Iterator[object]:
+        """Implement iteration over binary search trees.
+
+        Generate the keys in the tree in ascending order.
+        """
+        return self.iter_in_order()
+
+    def iter_pre_order(self) -> Iterator[object]:
+        """Do a pre-order traversal of the tree.
+
+        Generate the keys in the tree, in the order visited.
+        """
+        # Keep the subtrees yet to traverse in a stack.
+        to_visit = [self._root]
+        while to_visit:
+            node = to_visit.pop()
+            if node is not _EMPTY:
+                yield node.key
+                # Push the right subtree first, to traverse it last.
+                to_visit.append(node.right)
+                to_visit.append(node.left)
+
+    def iter_post_order(self) -> Iterator[object]:
+        """Do a post-order traversal of the tree.
+
+        Generate the keys in the tree, in the order visited.
+        """
+        # Keep the subtrees yet to traverse in a stack, each with a flag
+        # stating whether its root can be visited, because its subtrees
+        # were already traversed.
+        to_visit = [(self._root, False)]
+        while to_visit:
+            node, subtrees_done = to_visit.pop()
+            if node is _EMPTY:
+                continue
+            if subtrees_done:
+                yield node.key
+            else:
+                to_visit.append((node, True))
+                to_visit.append((node.right, False))
+                to_visit.append((node.left, False))
 
     def smallest_key(self) -> Comparable | None:
         """Return the smallest key in the tree.
 
         Return None if the tree is empty.
         """
-        # Base case: the empty tree.
         if self.is_empty():
             return None
-        assert self._left is not None and self._right is not None
-        # Base case: the smallest key is in the root.
-        if self._left.is_empty():
-            return self._key
-        # Reduction step: only consider the left subtree.
-        # Recursive step: find the smallest node there.
-        # Inductive step: not needed.
-        return self._left.smallest_key()
+        node = self._root
+        # The smallest key is in the leftmost node.
+        while node.left is not _EMPTY:
+            node = node.left
+        return node.key
+
+    def largest_key(self) -> Comparable | None:
+        """Return the largest key in the tree.
+
+        Return None if the tree is empty.
+        """
+        if self.is_empty():
+            return None
+        node = self._root
+        # The largest key is in the rightmost node.
+        while node.right is not _EMPTY:
+            node = node.right
+        return node.key
+
+    # The following inspectors find the closest keys to the_key,
+    # which doesn't have to be in the tree.
+    # They go down a single path, so they take time proportional
+    # to the height of the tree.
+
+    def floor(self, the_key: Comparable) -> Comparable | None:
+        """Return the largest key in the tree that is at most the_key.
+
+        Return None if all keys are larger than the_key.
+        """
+        return self._closest_key(the_key, False, True)
+
+    def ceiling(self, the_key: Comparable) -> Comparable | None:
+        """Return the smallest key in the tree that is at least the_key.
+
+        Return None if all keys are smaller than the_key.
+        """
+        return self._closest_key(the_key, True, True)
+
+    def predecessor(self, the_key: Comparable) -> Comparable | None:
+        """Return the largest key in the tree that is smaller than the_key.
+
+        Return None if there's no such key.
+        """
+        return self._closest_key(the_key, False, False)
+
+    def successor(self, the_key: Comparable) -> Comparable | None:
+        """Return the smallest key in the tree that is larger than the_key.
+
+        Return None if there's no such key.
+        """
+        return self._closest_key(the_key, True, False)
+
+    def range(self, low: Comparable, high: Comparable) -> Iterator[object]:
+        """Generate, in ascending order, the keys from low to high.
+
+        Both low and high are included, if they're in the tree.
+        Only visit the nodes on the paths to low and high and
+        the nodes in between, i.e. skip the subtrees outside the range.
+        """
+        # Do an in-order traversal that skips keys smaller than low
+        # and stops after the last key not larger than high.
+        to_visit: list[_Node] = []
+        node = self._root
+        while True:
+            while node is not _EMPTY:
+                # If the root is too small, so is its left subtree.
+                if node.key < low:
+                    node = node.right
+                else:
+                    to_visit.append(node)
+                    node = node.left
+            if not to_visit:
+                return
+            node = to_visit.pop()
+            if high < node.key:
+                return
+            yield node.key
+            node = node.right
+
+    # The following inspectors use the size of each subtree
+    # to skip it entirely, so they take time proportional to the height.
+
+    def rank(self, the_key: Comparable) -> int:
+        """Return how many keys in the tree are smaller than the_key.
+
+        The_key doesn't have to be in the tree.
+        The smallest key has rank 0, the next one rank 1, etc.
+        """
+        rank = 0
+        node = self._root
+        while node is not _EMPTY:
+            if the_key < node.key:
+                node = node.left
+            # If the_key is larger than the root, so is the whole left subtree.
+            elif node.key < the_key:
+                rank = rank + node.left.size + 1
+                node = node.right
+            else:
+                return rank + node.left.size
+        return rank
+
+    def select(self, rank: int) -> Comparable | None:
+        """Return the key with the given rank.
+
+        The smallest key has rank 0, the next one rank 1, etc.
+        Return None if the rank isn't between 0 and the number of keys - 1.
+        """
+        if not 0 <= rank < len(self):
+            return None
+        node = self._root
+        while True:
+            left_size = node.left.size
+            # If the left subtree has more keys than the rank, it has the key.
+            if rank < left_size:
+                node = node.left
+            elif rank == left_size:
+                return node.key
+            # Otherwise skip the left subtree and the root.
+            else:
+                rank = rank - left_size - 1
+                node = node.right
+
+    # The following inspectors are for internal use.
+
+    def _in_order_nodes(self) -> Iterator[_Node]:
+        # Generate the nodes in ascending order of key.
+        # Keep the nodes yet to visit in a stack.
+        to_visit: list[_Node] = []
+        node = self._root
+        while to_visit or node is not _EMPTY:
+            # Go down the left subtrees, postponing the visit of their roots.
+            while node is not _EMPTY:
+                to_visit.append(node)
+                node = node.left
+            # The left subtree has been traversed: visit the root
+            # and then traverse the right subtree.
+            node = to_visit.pop()
+            yield node
+            node = node.right
+
+    def _closest_key(
+        self, the_key: Comparable, larger: bool, equal: bool
+    ) -> Comparable | None:
+        # Return the closest key that is larger (or smaller) than the_key.
+        # If equal is True, return the_key if it's in the tree.
+        closest = None
+        node = self._root
+        while node is not _EMPTY:
+            if the_key < node.key:
+                # The root is larger than the_key, and closer than the
+                # larger keys found so far. Look for closer keys on the left.
+                if larger:
+                    closest = node.key
+                node = node.left
+            elif node.key < the_key:
+                if not larger:
+                    closest = node.key
+                node = node.right
+            # The root has the_key.
+            elif equal:
+                return node.key
+            # The closest key is in the subtree on the wanted side.
+            elif larger:
+                node = node.right
+            else:
+                node = node.left
+        return closest
+
+    # Set operations
+    # --------------
+    # Each operation returns a new tree of the same class as this one,
+    # built from the sorted pairs, so it's as balanced as possible.
+    # The pairs are obtained by merging the in-order traversals of both trees,
+    # like merging two sorted lists, which takes linear time.
+    # For the intersection and difference, if one tree is much smaller than
+    # the other, it's faster to look up each of its keys in the other tree.
+
+    def union(self: Tree, other: "BinarySearchTree") -> Tree:
+        """Return a new tree with the keys in this or the other tree.
+
+        If a key is in both trees, the new tree has the other tree's value,
+        as if the other tree's pairs were added to this tree.
+        """
+        pairs: list[Pair] = []
+        mine = self._in_order_nodes()
+        theirs = other._in_order_nodes()
+        node = next(mine, _EMPTY)
+        other_node = next(theirs, _EMPTY)
+        while node is not _EMPTY and other_node is not _EMPTY:
+            if node.key < other_node.key:
+                pairs.append((node.key, node.value))
+                node = next(mine, _EMPTY)
+            elif other_node.key < node.key:
+                pairs.append((other_node.key, other_node.value))
+                other_node = next(theirs, _EMPTY)
+            else:
+                pairs.append((other_node.key, other_node.value))
+                node = next(mine, _EMPTY)
+                other_node = next(theirs, _EMPTY)
+        # At most one of the trees has pairs left.
+        if node is not _EMPTY:
+            pairs.append((node.key, node.value))
+            pairs.extend((node.key, node.value) for node in mine)
+        if other_node is not _EMPTY:
+            pairs.append((other_node.key, other_node.value))
+            pairs.extend((node.key, node.value) for node in theirs)
+        return type(self).from_sorted(pairs)
+
+    def intersection(self: Tree, other: "BinarySearchTree") -> Tree:
+        """Return a new tree with the keys in this and the other tree.
+
+        The new tree has the values in this tree.
+        """
+        pairs: list[Pair] = []
+        if self._is_much_smaller(other):
+            for node in self._in_order_nodes():
+                if node.key in other:
+                    pairs.append((node.key, node.value))
+        elif other._is_much_smaller(self):
+            for other_node in other._in_order_nodes():
+                value = self.value(other_node.key)
+                if value is not None:
+                    pairs.append((other_node.key, value))
+        else:
+            mine = self._in_order_nodes()
+            theirs = other._in_order_nodes()
+            node = next(mine, _EMPTY)
+            other_node = next(theirs, _EMPTY)
+            while node is not _EMPTY and other_node is not _EMPTY:
+                if node.key < other_node.key:
+                    node = next(mine, _EMPTY)
+                elif other_node.key < node.key:
+                    other_node = next(theirs, _EMPTY)
+                else:
+                    pairs.append((node.key, node.value))
+                    node = next(mine, _EMPTY)
+                    other_node = next(theirs, _EMPTY)
+        return type(self).from_sorted(pairs)
+
+    def difference(self: Tree, other: "BinarySearchTree") -> Tree:
+        """Return a new tree with the keys in this tree but not the other.
+
+        The new tree has the values in this tree.
+        """
+        pairs: list[Pair] = []
+        if self._is_much_smaller(other):
+            for node in self._in_order_nodes():
+                if node.key not in other:
+                    pairs.append((node.key, node.value))
+        else:
+            mine = self._in_order_nodes()
+            theirs = other._in_order_nodes()
+            node = next(mine, _EMPTY)
+            other_node = next(theirs, _EMPTY)
+            while node is not _EMPTY and other_node is not _EMPTY:
+                if node.key < other_node.key:
+                    pairs.append((node.key, node.value))
+                    node = next(mine, _EMPTY)
+                elif other_node.key < node.key:
+                    other_node = next(theirs, _EMPTY)
+                else:
+                    node = next(mine, _EMPTY)
+                    other_node = next(theirs, _EMPTY)
+            if node is not _EMPTY:
+                pairs.append((node.key, node.value))
+                pairs.extend((node.key, node.value) for node in mine)
+        return type(self).from_sorted(pairs)
+
+    def _is_much_smaller(self, other: "BinarySearchTree") -> bool:
+        # Return True if looking up this tree's keys in the other tree
+        # is faster than traversing both trees. That's only the case if the
+        # other tree is balanced, with height about log2 of its size.
+        # Otherwise a lookup may take linear time.
+        if not other._balanced:
+            return False
+        return len(self) * len(other).bit_length() < len(other)
 
     # Modifiers
     # ---------
@@ -159,78 +576,511 @@ class BinarySearchTree:
         If it hasn't, add a new node with the_key and the_value.
         """
         assert the_value is not None
-        # Base case: if the tree is empty, create one with the key-value pair.
+        node = self._root
+        # Go down the tree until finding the key or an empty subtree.
+        while node is not _EMPTY:
+            # If the key is in the root, replace the value.
+            if the_key == node.key:
+                node.value = the_value
+                return
+            if the_key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        # The key isn't in the tree: go down again, counting the new node
+        # in each subtree on the path to the empty subtree it replaces.
+        new_node = _Node(the_key, the_value)
+        parent = _EMPTY
+        node = self._root
+        while node is not _EMPTY:
+            node.size += 1
+            parent = node
+            if the_key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        if parent is _EMPTY:
+            self._root = new_node
+        elif the_key < parent.key:
+            parent.left = new_node
+        else:
+            parent.right = new_node
+
+    def remove(self, the_key: Comparable) -> None:
+        """Remove the node with the_key from the tree.
+
+        Do nothing if the tree hasn't the_key.
+        """
+        parent = _EMPTY
+        node = self._root
+        # Go down the tree until finding the key,
+        # counting one node less in each subtree on the way.
+        while node is not _EMPTY and not the_key == node.key:
+            node.size -= 1
+            parent = node
+            if the_key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        # If the tree hasn't the key, go down again to undo the counting.
+        if node is _EMPTY:
+            node = self._root
+            while node is not _EMPTY:
+                node.size += 1
+                if the_key < node.key:
+                    node = node.left
+                else:
+                    node = node.right
+            return
+        # If the node has two children, replace its pair by its successor's,
+        # with the next higher key, and remove the successor node instead.
+        # The successor is the leftmost node of the right subtree,
+        # so continue down the same path to find it.
+        if node.left is not _EMPTY and node.right is not _EMPTY:
+            node.size -= 1
+            parent = node
+            successor = node.right
+            while successor.left is not _EMPTY:
+                successor.size -= 1
+                parent = successor
+                successor = successor.left
+            node.key = successor.key
+            node.value = successor.value
+            node = successor
+        # The node to remove has at most one child, which takes its place.
+        if node.left is _EMPTY:
+            self._link(parent, node, node.right)
+        else:
+            self._link(parent, node, node.left)
+
+    def pop_min(self) -> Pair:
+        """Remove the node with the smallest key from the tree.
+
+        Return its key and value, as a pair.
+        Assume the tree is not empty.
+        """
+        assert not self.is_empty()
+        parent = _EMPTY
+        node = self._root
+        # Go down the left subtrees to the leftmost node,
+        # counting one node less in each subtree on the way.
+        while node.left is not _EMPTY:
+            node.size -= 1
+            parent = node
+            node = node.left
+        # Its right subtree, if any, takes its place.
+        self._link(parent, node, node.right)
+        return (node.key, node.value)
+
+    def pop_max(self) -> Pair:
+        """Remove the node with the largest key from the tree.
+
+        Return its key and value, as a pair.
+        Assume the tree is not empty.
+        """
+        assert not self.is_empty()
+        parent = _EMPTY
+        node = self._root
+        while node.right is not _EMPTY:
+            node.size -= 1
+            parent = node
+            node = node.right
+        self._link(parent, node, node.left)
+        return (node.key, node.value)
+
+    # The following modifiers move whole subtrees between trees,
+    # instead of one node at a time.
+
+    def split(self: Tree, the_key: Comparable) -> Tree:
+        """Move the nodes with keys from the_key onwards to a new tree.
+
+        Return the new tree, of the same class as this one.
+        Afterwards, this tree only has the keys smaller than the_key.
+        Take time proportional to the height of the tree.
+        """
+        # Go down the path to the_key. Each node on it, with the subtree
+        # off the path, goes to the smaller or larger keys.
+        path = []
+        node = self._root
+        while node is not _EMPTY:
+            path.append(node)
+            if node.key < the_key:
+                node = node.right
+            else:
+                node = node.left
+        self._copy_path(path)
+        # Go back up, joining each node with the part of the path below it.
+        smaller = _EMPTY
+        larger = _EMPTY
+        for node in reversed(path):
+            if node.key < the_key:
+                smaller = self._join(node.left, node, smaller)
+            else:
+                larger = self._join(larger, node, node.right)
+        self._root = smaller
+        tree = type(self)()
+        tree._root = larger
+        return tree
+
+    def join(self, other: "BinarySearchTree") -> None:
+        """Move all nodes of the other tree to this tree.
+
+        Assume the other tree is of the same class as this one and
+        all its keys are larger than the keys in this tree.
+        Afterwards, the other tree is empty.
+        Take time proportional to the height of the trees.
+        """
+        assert type(other) is type(self)
+        if other.is_empty():
+            return
         if self.is_empty():
-            self._key = the_key
-            self._value = the_value
-            self._left = BinarySearchTree()
-            self._right = BinarySearchTree()
+            self._root = other._root
         else:
-            assert self._key is not None
-            assert self._left is not None and self._right is not None
-            # Base case: if the key is in the root, replace the value.
-            if the_key == self._key:
-                self._value = the_value
-            # Reduction step: choose the appropriate subtree.
-            # Recursive step: add/replace the key-value pair there.
-            # Inductive step: nothing to do
-            elif the_key < self._key:
-                self._left.add(the_key, the_value)
+            largest = self.largest_key()
+            smallest = other.smallest_key()
+            assert largest is not None and smallest is not None
+            assert largest < smallest
+            # The other tree's smallest pair joins both trees.
+            key, value = other.pop_min()
+            self._root = self._join(self._root, _Node(key, value), other._root)
+        other._root = _EMPTY
+
+    # The following modifiers are for internal use.
+
+    def _update(self, node: _Node) -> None:
+        # Compute the node's size from the (correct) sizes of its subtrees.
+        node.size = node.left.size + node.right.size + 1
+
+    def _join(self, left: _Node, node: _Node, right: _Node) -> _Node:
+        # Return the root of a subtree with the nodes of left, node and right.
+        # Assume the keys in left are smaller than node's key and
+        # the keys in right are larger.
+        node.left = left
+        node.right = right
+        self._update(node)
+        return node
+
+    def _link(self, parent: _Node, child: _Node, new_child: _Node) -> None:
+        # Replace the parent's non-empty child by the new child.
+        # If the parent is empty, the child is the root of the tree.
+        if parent is _EMPTY:
+            self._root = new_child
+        elif parent.left is child:
+            parent.left = new_child
+        else:
+            parent.right = new_child
+
+    def _copy_path(self, path: list[_Node]) -> None:
+        # The nodes on the path, from a node down to one of its descendants,
+        # are about to change. Persistent trees replace them by copies.
+        pass
+
+
+class BalancedSearchTree(BinarySearchTree):
+    """Provide a binary search tree that keeps itself balanced.
+
+    This is an AVL tree, named after its inventors Adelson-Velsky and Landis.
+    An AVL tree is a BST in which, for every node, the heights of the
+    left and right subtrees differ by at most 1. This guarantees that
+    a tree with n nodes has height O(log n), no matter the order in which
+    keys are added and removed. Hence searching, adding and removing a key
+    take logarithmic time in the worst case.
+    """
+
+    # Representation
+    # --------------
+    # Each node also stores the height of its subtree, so that checking
+    # whether a node is balanced takes constant time.
+    # Heights and sizes are recomputed from those of the subtrees
+    # whenever the subtrees change.
+    # After adding or removing a node, each node on the path from the
+    # changed node to the root is rebalanced, if necessary, by rotating it.
+
+    __slots__ = ()
+
+    _balanced = True
+
+    # Inspectors
+    # ----------
+
+    def height(self) -> int:
+        """Return how many levels the tree has.
+
+        The root is in level 1, its children in level 2, etc.
+        """
+        return self._root.height
+
+    # The following inspector is for internal use.
+
+    def _path(self, the_key: Comparable) -> list[_Node]:
+        # Return the nodes from the root down to the one with the_key,
+        # or to the one that would be the parent of the_key.
+        path = []
+        node = self._root
+        while node is not _EMPTY:
+            path.append(node)
+            if the_key == node.key:
+                break
+            if the_key < node.key:
+                node = node.left
             else:
-                self._right.add(the_key, the_value)
+                node = node.right
+        return path
+
+    # Modifiers
+    # ---------
+
+    def add(self, the_key: Comparable, the_value: object) -> None:
+        """Associate the_value to the_key in the tree.
+
+        Assume the_value is not None.
+        If the tree has the_key, replace its associated value by the_value.
+        If it hasn't, add a new node with the_key and the_value.
+        """
+        assert the_value is not None
+        path = self._path(the_key)
+        self._copy_path(path)
+        # If the tree has the key, only the value changes, not the shape.
+        if path and the_key == path[-1].key:
+            path[-1].value = the_value
+            return
+        new_node = _Node(the_key, the_value)
+        if not path:
+            self._root = new_node
+        elif the_key < path[-1].key:
+            path[-1].left = new_node
+        else:
+            path[-1].right = new_node
+        self._rebalance(path)
 
     def remove(self, the_key: Comparable) -> None:
         """Remove the node with the_key from the tree.
 
         Do nothing if the tree hasn't the_key.
         """
-        # Base case: the tree is empty.
-        if self.is_empty():
+        path = self._path(the_key)
+        if not path or not the_key == path[-1].key:
             return
-        assert self._key is not None
-        assert self._left is not None and self._right is not None
-        left_tree = self._left
-        right_tree = self._right
-        # Base case: the key is in the root node.
-        if the_key == self._key:
-            # If both subtrees are empty, removing the root empties the tree.
-            if left_tree.is_empty() and right_tree.is_empty():
-                self._key = None
-                self._value = None
-                self._left = None
-                self._right = None
-            # If the tree has only one subtree, that's the new tree.
-            elif left_tree.is_empty():
-                # turn off warning about accessing data of the subtrees
-                # pylint: disable=protected-access
-                self._key = right_tree._key
-                self._value = right_tree._value
-                self._left = right_tree._left
-                self._right = right_tree._right
-            elif right_tree.is_empty():
-                # pylint: disable=protected-access
-                self._key = left_tree._key
-                self._value = left_tree._value
-                self._left = left_tree._left
-                self._right = left_tree._right
-            # If the tree has two non-empty subtrees,
-            # replace the root by its successor, with the next higher key,
-            # which is the smallest node in the right subtree.
-            else:
-                self._key = right_tree.smallest_key()
-                assert self._key is not None
-                self._value = right_tree.value(self._key)
-                right_tree.remove(self._key)
-        # Reduction step: choose the appropriate subtree.
-        # Recursive step: delete the node from that subtree.
-        # Inductive step: nothing to do.
-        elif the_key < self._key:
-            left_tree.remove(the_key)
+        index = len(path) - 1
+        node = path[index]
+        # If the node has two children, replace its pair by its successor's,
+        # with the next higher key, and remove the successor node instead.
+        # The successor is the leftmost node of the right subtree,
+        # so continue down the same path to find it.
+        if node.left is not _EMPTY and node.right is not _EMPTY:
+            successor = node.right
+            path.append(successor)
+            while successor.left is not _EMPTY:
+                successor = successor.left
+                path.append(successor)
+        self._copy_path(path)
+        # If the node has at most one child, this doesn't change it.
+        path[index].key = path[-1].key
+        path[index].value = path[-1].value
+        self._remove_last(path)
+
+    def pop_min(self) -> Pair:
+        """Remove the node with the smallest key from the tree.
+
+        Return its key and value, as a pair.
+        Assume the tree is not empty.
+        """
+        assert not self.is_empty()
+        path = [self._root]
+        while path[-1].left is not _EMPTY:
+            path.append(path[-1].left)
+        self._copy_path(path)
+        node = path[-1]
+        self._remove_last(path)
+        return (node.key, node.value)
+
+    def pop_max(self) -> Pair:
+        """Remove the node with the largest key from the tree.
+
+        Return its key and value, as a pair.
+        Assume the tree is not empty.
+        """
+        assert not self.is_empty()
+        path = [self._root]
+        while path[-1].right is not _EMPTY:
+            path.append(path[-1].right)
+        self._copy_path(path)
+        node = path[-1]
+        self._remove_last(path)
+        return (node.key, node.value)
+
+    # The following modifiers are for internal use.
+
+    def _remove_last(self, path: list[_Node]) -> None:
+        # Remove the last node on the path, which has at most one child.
+        # Its child, if any, takes its place.
+        node = path.pop()
+        if node.left is _EMPTY:
+            child = node.right
         else:
-            right_tree.remove(the_key)
+            child = node.left
+        self._link(path[-1] if path else _EMPTY, node, child)
+        self._rebalance(path)
+
+    def _update(self, node: _Node) -> None:
+        # Compute the height and size from the (correct) ones of the subtrees.
+        node.height = max(node.left.height, node.right.height) + 1
+        node.size = node.left.size + node.right.size + 1
+
+    def _rotate_right(self, node: _Node) -> _Node:
+        # Make the left child the subtree's root and node its right child.
+        # Return the new root.
+        pivot = node.left
+        # The pivot's right subtree moves to the old root.
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_left(self, node: _Node) -> _Node:
+        # Make the right child the subtree's root and node its left child.
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _balance(self, node: _Node) -> _Node:
+        # Restore the AVL property of the node, assuming both subtrees
+        # are AVL trees and their heights differ by at most 2.
+        # Return the root of the rebalanced subtree.
+        left = node.left
+        right = node.right
+        if left.height > right.height + 1:
+            # If the left subtree's right side is higher (left-right case),
+            # first rotate the left subtree to get the left-left case.
+            if left.left.height < left.right.height:
+                node.left = self._rotate_left(left)
+            return self._rotate_right(node)
+        if right.height > left.height + 1:
+            # The right-left and right-right cases are symmetric.
+            if right.right.height < right.left.height:
+                node.right = self._rotate_right(right)
+            return self._rotate_left(node)
+        self._update(node)
+        return node
+
+    def _join(self, left: _Node, node: _Node, right: _Node) -> _Node:
+        # Return the root of an AVL tree with the nodes of left, node, right.
+        # Assume left and right are AVL trees, the keys in left are smaller
+        # than node's key and the keys in right are larger.
+        # If one subtree is much higher, go down its side facing the other
+        # subtree, until reaching a subtree about as high as the other one.
+        # That subtree and the other one become the node's subtrees, and
+        # the node takes the place of that subtree. Then rebalance upwards.
+        # This takes time proportional to the difference of heights.
+        if left.height > right.height + 1:
+            path = []
+            subtree = left
+            while subtree.height > right.height + 1:
+                path.append(subtree)
+                subtree = subtree.right
+            self._copy_path(path)
+            path[-1].right = self._join(subtree, node, right)
+            for index in range(len(path) - 1, 0, -1):
+                path[index - 1].right = self._balance(path[index])
+            return self._balance(path[0])
+        if right.height > left.height + 1:
+            path = []
+            subtree = right
+            while subtree.height > left.height + 1:
+                path.append(subtree)
+                subtree = subtree.left
+            self._copy_path(path)
+            path[-1].left = self._join(left, node, subtree)
+            for index in range(len(path) - 1, 0, -1):
+                path[index - 1].left = self._balance(path[index])
+            return self._balance(path[0])
+        return super()._join(left, node, right)
+
+    def _rebalance(self, path: list[_Node]) -> None:
+        # Rebalance each node on the path, from the last one up to the root,
+        # and link the new root of each subtree to the node above it.
+        # This also updates the heights and sizes.
+        for index in range(len(path) - 1, -1, -1):
+            node = path[index]
+            new_node = self._balance(node)
+            if new_node is not node:
+                parent = path[index - 1] if index > 0 else _EMPTY
+                self._link(parent, node, new_node)
+
+
+class PersistentSearchTree(BalancedSearchTree):
+    """Provide a balanced search tree with snapshots.
+
+    Changing a persistent tree doesn't change any of its nodes: the nodes
+    that would change are copied and the copies are changed instead.
+    All other nodes are shared between the tree before and after the change.
+    So taking a snapshot of the tree takes constant time, and later changes
+    to the tree don't affect the snapshot, and vice versa.
+    Adding or removing a key creates O(log n) nodes.
+    """
+
+    # Representation
+    # --------------
+    # Nodes that belong to a tree are never modified, because they
+    # may be shared with other trees. Before a modifier changes the nodes
+    # on a path, they are replaced by copies that only this tree has.
+    # Rotations also change a child or grandchild of the rotated node,
+    # so those are copied too.
+    # pylint: disable=protected-access
+
+    __slots__ = ()
+
+    # Creator
+    # -------
+
+    def snapshot(self: Tree) -> Tree:
+        """Return a new tree with the same pairs as this one.
+
+        Take constant time, because both trees share all nodes.
+        """
+        tree = type(self)()
+        tree._root = self._root
+        return tree
+
+    # Modifiers
+    # ---------
+    # The modifiers are inherited. The following ones copy the nodes
+    # before the inherited methods change them.
+
+    def _copy_path(self, path: list[_Node]) -> None:
+        # Replace each node on the path by a copy linked to the next copy.
+        # If the path starts at the root, the copy becomes the root.
+        previous = _EMPTY
+        for index, node in enumerate(path):
+            copy = node.copy()
+            if previous is not _EMPTY:
+                self._link(previous, node, copy)
+            elif node is self._root:
+                self._root = copy
+            path[index] = copy
+            previous = copy
+
+    def _balance(self, node: _Node) -> _Node:
+        # The node is a copy, but the children and grandchildren that the
+        # rotations change may be shared, so copy them first.
+        left = node.left
+        right = node.right
+        if left.height > right.height + 1:
+            node.left = left = left.copy()
+            if left.left.height < left.right.height:
+                left.right = left.right.copy()
+        elif right.height > left.height + 1:
+            node.right = right = right.copy()
+            if right.right.height < right.left.height:
+                right.left = right.left.copy()
+        return super()._balance(node)
 
 
 # Exercises
 # ---------
-# - Write `smallest_key()` in an iterative way.
-# - Add a method `__len__` that returns the number of nodes.
+# - Use `len` and `select` to write a method that returns the median key.
+# - Write a method that returns the keys in exactly one of two trees.
@@ -0,0 +1,271 @@
+"""A cache with a bounded number of key-value pairs."""
+
+import time
+
+from .hash_table import HashTable
+
+# The following constants make the code more readable.
+# pylint: disable=invalid-name
+
+_PREVIOUS = 0
+_NEXT = 1
+_KEY = 2
+_VALUE = 3
+_EXPIRY = 4
+_USES = 5
+
+# The ways of choosing which item to evict when the cache is full.
+_POLICIES = ("lru", "lfu", "fifo")
+
+
+class Cache:
+    """Provide a collection of at most a given number of key-value pairs.
+
+    When the cache is full, adding an item evicts another item,
+    chosen by the eviction policy. An item may also expire after
+    some time. Getting, adding and removing an item take constant time.
+    """
+
+    # Representation
+    # --------------
+    # The cache has an index, a hash table that maps each key to a node.
+    # Each node has a key, its value, the time it expires (or None if it
+    # doesn't) and how often it was used.
+    # A node is represented by a Python list of size 6, hence the constants.
+    #
+    # The nodes with the same number of uses form a doubly linked list,
+    # like in the Deque class, in the order they were added or last used.
+    # To make adding and removing a node simpler, each list has an extra
+    # node, the sentinel, that is before the first and after the last node.
+    # A list without nodes is a sentinel that points to itself.
+    # A dictionary maps each number of uses to its list.
+    #
+    # For 'lru' and 'fifo', the number of uses is always 1, so all nodes
+    # are in the same list. For 'lru', using a node moves it to the back.
+    # For 'lfu', using a node moves it to the back of the next list.
+    # The cache evicts the node at the front of the list with fewest uses.
+    # It keeps that number, which only changes when adding a node (to 1)
+    # or when using the last node with that number of uses (to 1 more).
+    # Removing a node may empty that list, but then the cache isn't full,
+    # so a node is added, which sets the number to 1, before the next
+    # node is evicted.
+    #
+    # Expired nodes are only removed when they are found by `get`,
+    # or when they are evicted, as going through all nodes to find them
+    # takes time proportional to the number of items.
+    # pylint: disable=too-many-instance-attributes
+
+    # Creator
+    # -------
+
+    def __init__(
+        self,
+        capacity,
+        policy="lru",
+        time_to_live=None,
+        clock=time.monotonic,
+    ):
+        """Initialise the cache to be empty.
+
+        The capacity is the maximum number of items in the cache.
+        Assume it's positive.
+
+        The policy chooses which item to evict when the cache is full:
+
+        - 'lru' evicts the least recently used item
+        - 'lfu' evicts the least frequently used item;
+          if there are several, it evicts the least recently used of them
+        - 'fifo' evicts the item added first.
+
+        Adding an item and getting its value are uses of the item.
+
+        If time_to_live is given, each item expires that many seconds
+        after it's added, unless `put` gives another time to live.
+        Assume time_to_live is positive.
+        The clock is a function without arguments that returns
+        the current time in seconds.
+        """
+        assert capacity > 0
+        assert policy in _POLICIES
+        assert time_to_live is None or time_to_live > 0
+        self._capacity = capacity
+        self._policy = policy
+        self._time_to_live = time_to_live
+        self._clock = clock
+        # With twice as many buckets as items, the index is never full.
+        self._index = HashTable(2 * capacity)
+        self._lists = dict()
+        self._fewest_uses = 1
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    # Inspectors
+    # ----------
+
+    def __len__(self):
+        """Implement the `len` function for caches.
+
+        Return the number of items in the cache,
+        including expired items that haven't been removed yet.
+        """
+        return len(self._index)
+
+    def __contains__(self, the_key):
+        """Implement the `in` operator for caches.
+
+        Return True if the cache has an unexpired item with the_key,
+        otherwise False. This isn't a use of the item.
+        """
+        node = self._index.value(the_key)
+        return node is not None and not self._expired(node)
+
+    def stats(self):
+        """Return statistics on how the cache was used.
+
+        Return a dictionary with the following keys:
+
+        - 'items': the number of items, as given by `len`
+        - 'capacity': the maximum number of items
+        - 'hits': how many times `get` found the key
+        - 'misses': how many times `get` didn't find the key
+        - 'evictions': how many items were evicted to add others
+        - 'expirations': how many expired items were removed.
+        """
+        return dict(
+            items=len(self._index),
+            capacity=self._capacity,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+        )
+
+    # The following inspector is for internal use.
+
+    def _expired(self, node):
+        # Return True if the node has expired, otherwise False.
+        expiry = node[_EXPIRY]
+        return expiry is not None and expiry <= self._clock()
+
+    # Modifiers
+    # ---------
+
+    def get(self, the_key):
+        """If the cache has the_key, return the associated value.
+
+        Otherwise return None. If the item has expired, remove it
+        and return None. This changes the cache, as it uses the item.
+        """
+        node = self._index.value(the_key)
+        if node is None:
+            self._misses += 1
+            return None
+        if self._expired(node):
+            self._delete(node)
+            self._expirations += 1
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._use(node)
+        return node[_VALUE]
+
+    def put(self, the_key, the_value, time_to_live=None):
+        """Associate the_value to the_key. Return nothing.
+
+        If the cache has the_key, replace its value and time to live,
+        otherwise add a new item, evicting another item if needed.
+        The time to live is as for the creator.
+        Assume the_value is not None and time_to_live is positive.
+        """
+        assert the_value is not None
+        assert time_to_live is None or time_to_live > 0
+        if time_to_live is None:
+            time_to_live = self._time_to_live
+        if time_to_live is None:
+            expiry = None
+        else:
+            expiry = self._clock() + time_to_live
+        node = self._index.value(the_key)
+        if node is not None:
+            node[_VALUE] = the_value
+            node[_EXPIRY] = expiry
+            self._use(node)
+            return
+        if len(self._index) == self._capacity:
+            self._evict()
+        node = [None, None, the_key, the_value, expiry, 1]
+        self._append(node)
+        self._fewest_uses = 1
+        self._index.add(the_key, node)
+
+    def remove(self, the_key):
+        """Remove the item with the_key from the cache. Return nothing.
+
+        Do nothing if there's no item with the_key.
+        """
+        node = self._index.value(the_key)
+        if node is not None:
+            self._delete(node)
+
+    # The following modifiers are for internal use.
+
+    def _append(self, node):
+        # Add the node to the back of the list for its number of uses.
+        uses = node[_USES]
+        sentinel = self._lists.get(uses)
+        if sentinel is None:
+            sentinel = [None, None]
+            sentinel[_PREVIOUS] = sentinel
+            sentinel[_NEXT] = sentinel
+            self._lists[uses] = sentinel
+        last = sentinel[_PREVIOUS]
+        node[_PREVIOUS] = last
+        node[_NEXT] = sentinel
+        last[_NEXT] = node
+        sentinel[_PREVIOUS] = node
+
+    def _unlink(self, node):
+        # Take the node out of its list. Discard the list if it's empty.
+        previous = node[_PREVIOUS]
+        following = node[_NEXT]
+        previous[_NEXT] = following
+        following[_PREVIOUS] = previous
+        if previous is following:
+            del self._lists[node[_USES]]
+
+    def _use(self, node):
+        # Move the node to the back of its list or, for 'lfu',
+        # to the back of the list for one more use.
+        if self._policy == "fifo":
+            return
+        self._unlink(node)
+        if self._policy == "lfu":
+            uses = node[_USES]
+            if uses == self._fewest_uses and uses not in self._lists:
+                self._fewest_uses += 1
+            node[_USES] = uses + 1
+        self._append(node)
+
+    def _delete(self, node):
+        # Remove the node from its list and the index.
+        self._unlink(node)
+        self._index.remove(node[_KEY])
+
+    def _evict(self):
+        # Remove the node at the front of the list with fewest uses.
+        node = self._lists[self._fewest_uses][_NEXT]
+        if self._expired(node):
+            self._expirations += 1
+        else:
+            self._evictions += 1
+        self._delete(node)
+
+
+# Exercises
+# ---------
+# - Add a method `remove_expired` that removes all expired items.
+#   How long does it take?
+# - Change the cache so that its capacity is the total size of the values,
+#   with the size of each value given when it's put in the cache.
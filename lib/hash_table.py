@@ -1,36 +1,96 @@
 """An implementation of hash tables."""
 
-# The following constants make the code more readable.
+# pylint: disable=too-many-lines
 
-_KEY = 0  # pylint: disable=invalid-name
-_VALUE = 1  # pylint: disable=invalid-name
+import copy
+from abc import ABC, abstractmethod
+from array import array
 
+# The maximum fraction of buckets with deleted items. If there are more,
+# the table removes them, as they make searching for missing keys slower.
+_MAX_DELETED = 0.25  # pylint: disable=invalid-name
 
-class HashTable:
-    """Provide a collection of key-value pairs with unique keys.
+# The ways of choosing the next bucket to try.
+_PROBING = ("linear", "quadratic", "double")
+
+# The position of each part of an item in a chain.
+_HASH = 0  # pylint: disable=invalid-name
+_KEY = 1  # pylint: disable=invalid-name
+_VALUE = 2  # pylint: disable=invalid-name
+_ITEM_LENGTH = 3  # pylint: disable=invalid-name
+
+# The constants of the 64-bit finaliser of the MurmurHash3 function.
+_MASK = 2**64 - 1  # pylint: disable=invalid-name
+_MULTIPLIER_1 = 0xFF51AFD7ED558CCD  # pylint: disable=invalid-name
+_MULTIPLIER_2 = 0xC4CEB9FE1A85EC53  # pylint: disable=invalid-name
+
+
+def mixed_hash(the_key):
+    """Return the hash of the_key, with its bits mixed.
+
+    The built-in hash of an integer is the integer itself, so keys that
+    are multiples of some power of 2 only differ in their higher bits.
+    In a table with a power of 2 buckets, they all go to a few buckets.
+    Mixing makes every bit of the hash depend on every bit of the
+    built-in hash, which spreads such keys over all buckets.
+    Return a non-negative integer with 63 bits.
+    """
+    value = hash(the_key) & _MASK
+    value ^= value >> 33
+    value = (value * _MULTIPLIER_1) & _MASK
+    value ^= value >> 33
+    value = (value * _MULTIPLIER_2) & _MASK
+    value ^= value >> 33
+    return value >> 1
+
+
+class BaseHashTable(ABC):
+    """Provide what all hash tables in this module have in common.
 
-    Implement a closed hash table that doesn't grow.
-    Use linear probing for collision resolution.
-    Use the built-in hashing function.
+    This class is abstract, so it can't be instantiated: each subclass
+    decides how the items are stored in the buckets and how keys are found.
+    This class provides the dictionary-like interface, the methods that
+    process many items, and when to resize the table, based on
+    how many items and deleted items it has.
     """
 
     # Representation
     # --------------
-    # A hash table is represented by a fixed size list,
-    # each item being a key-value pair, represented by a list of length 2.
-    # An empty slot in the hash table is represented by the pair None-None,
-    # whereas a deleted item is represented by a pair key-None.
+    # Each table keeps count of the items and the deleted items,
+    # to know when to resize without going through the buckets.
+    # Tables without deleted items keep that count at zero.
+    # Resizing is done by the subclasses, as it depends on how
+    # the items are stored. It removes the deleted items.
 
     # Creator
     # -------
 
-    def __init__(self, number_of_buckets):
+    def __init__(
+        self,
+        number_of_buckets,
+        max_load_factor=None,
+        min_load_factor=None,
+        hash_function=hash,
+    ):
         """Initialise the table with the given number_of_buckets.
 
         Assume that the number_of_buckets is positive.
+        The load factors and hash function are as for the subclasses.
+        Assume max_load_factor is positive and
+        0 < min_load_factor < max_load_factor / 2.
         """
         assert number_of_buckets > 0
-        self._buckets = [[None, None]] * number_of_buckets
+        assert max_load_factor is None or max_load_factor > 0
+        if min_load_factor is not None:
+            assert max_load_factor is not None
+            assert 0 < min_load_factor < max_load_factor / 2
+        self._create_buckets(number_of_buckets)
+        self._minimum_buckets = number_of_buckets
+        self._max_load_factor = max_load_factor
+        self._min_load_factor = min_load_factor
+        self._hash_function = hash_function
+        self._length = 0
+        self._deleted = 0
 
     # Inspectors
     # ----------
@@ -40,34 +100,15 @@ class HashTable:
 
         Return the number of key-value pairs in the hash table.
         """
-        total = 0
-        for bucket in self._buckets:
-            if bucket[_VALUE] is not None:
-                total += 1
-        return total
+        return self._length
 
+    @abstractmethod
     def value(self, the_key):
         """If the table has the_key, return the associated value.
 
         Otherwise return None.
         """
-        # Remember the first bucket tried.
-        start_index = hash(the_key) % len(self._buckets)
-        index = start_index
-        # Keep going until we know whether the key exists or not.
-        while True:
-            bucket = self._buckets[index]
-            # If the bucket is empty, the item doesn't exist.
-            if bucket[_KEY] is None:
-                return None
-            # If the bucket has the key, return the value.
-            if bucket[_KEY] == the_key:
-                return bucket[_VALUE]
-            # Otherwise try the next bucket.
-            index = (index + 1) % len(self._buckets)
-            # If the search 'wrapped around', the item doesn't exist.
-            if index == start_index:
-                return None
+        raise NotImplementedError
 
     def __contains__(self, the_key):
         """Implement the `in` operator for hash tables.
@@ -76,9 +117,87 @@ class HashTable:
         """
         return self.value(the_key) is not None
 
+    def values_of(self, keys):
+        """Return a list with the value associated to each of the keys.
+
+        The value for a key that isn't in the table is None.
+        """
+        return [self.value(key) for key in keys]
+
+    @abstractmethod
+    def copy(self):
+        """Return a new table with the same items and buckets as this one.
+
+        This is faster than adding the items to a new table,
+        as the buckets are copied as they are.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self):
+        """Return statistics on how the buckets are used.
+
+        Return a dictionary with the keys and values described
+        by each subclass.
+        """
+        raise NotImplementedError
+
+    # The following inspectors make tables usable like dictionaries.
+
+    def __getitem__(self, the_key):
+        """Implement `table[the_key]`.
+
+        Return the value associated to the_key.
+        Raise KeyError if the table hasn't the_key.
+        """
+        value = self.value(the_key)
+        if value is None:
+            raise KeyError(the_key)
+        return value
+
+    @abstractmethod
+    def keys(self):
+        """Generate the keys in the table, in no particular order.
+
+        The table must not be changed while the keys are generated.
+        """
+        raise NotImplementedError
+
+    def __iter__(self):
+        """Implement iteration over hash tables.
+
+        Generate the keys in the table, like `keys`.
+        """
+        return self.keys()
+
+    @abstractmethod
+    def values(self):
+        """Generate the values in the table, in the same order as `keys`.
+
+        The table must not be changed while the values are generated.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def items(self):
+        """Generate the key-value pairs in the table, as tuples.
+
+        The pairs are in the same order as `keys`.
+        The table must not be changed while the pairs are generated.
+        """
+        raise NotImplementedError
+
+    # The following inspector is for internal use.
+
+    @abstractmethod
+    def _number_of_buckets(self):
+        # Return the number of buckets.
+        raise NotImplementedError
+
     # Modifiers
     # ---------
 
+    @abstractmethod
     def add(self, the_key, the_value):
         """Add an item to the table and return if the operation succeeded.
 
@@ -87,43 +206,890 @@ class HashTable:
         Return True if the item was added.
         Return False if the_value is None or the table is full.
         """
-        if the_value is None:
-            return False
-        start_index = hash(the_key) % len(self._buckets)
-        index = start_index
-        while True:
-            bucket = self._buckets[index]
-            # If the bucket is empty or has the_key, store the item there.
-            if bucket[_KEY] is None or bucket[_KEY] == the_key:
-                self._buckets[index] = [the_key, the_value]
-                return True
-            index = (index + 1) % len(self._buckets)
-            # If the search 'wrapped around', the table is full.
-            if index == start_index:
-                return False
+        raise NotImplementedError
 
     def remove(self, the_key):
         """Remove the item with the_key from the table. Return nothing.
 
         Do nothing if there's no item with the_key.
         """
-        start_index = hash(the_key) % len(self._buckets)
-        index = start_index
-        while True:
-            bucket = self._buckets[index]
+        if self._delete(the_key):
+            self._tidy()
+
+    @abstractmethod
+    def compact(self):
+        """Remove the deleted items from the table.
+
+        This makes searching for keys that aren't in the table faster.
+        """
+        raise NotImplementedError
+
+    # The following modifiers make tables usable like dictionaries.
+
+    def __setitem__(self, the_key, the_value):
+        """Implement `table[the_key] = the_value`.
+
+        Assume the_value is not None and the table isn't full.
+        """
+        added = self.add(the_key, the_value)
+        assert added
+
+    def __delitem__(self, the_key):
+        """Implement `del table[the_key]`.
+
+        Raise KeyError if the table hasn't the_key.
+        """
+        if not self._delete(the_key):
+            raise KeyError(the_key)
+        self._tidy()
+
+    def update(self, other):
+        """Add the items of other to this table.
+
+        The other collection can be a table, a dictionary or
+        a sequence of key-value pairs. Assume no value is None.
+        """
+        if hasattr(other, "items"):
+            other = other.items()
+        self.add_many(other)
+
+    # The following modifiers process many items in one call.
+    # Each one has the same effect as a loop that processes
+    # one item at a time, but resizes the table at most once.
+
+    def add_many(self, pairs):
+        """Add the key-value pairs to the table, in the given order.
+
+        Return a list with the result of `add` for each pair.
+        If the table can grow, it first grows enough for all pairs.
+        """
+        pairs = list(pairs)
+        self._grow(len(pairs))
+        return [self.add(key, value) for key, value in pairs]
+
+    def remove_many(self, keys):
+        """Remove the items with the given keys from the table.
+
+        Ignore the keys that aren't in the table. Return nothing.
+        If the table can shrink, it does so after removing all items.
+        """
+        for key in keys:
+            self._delete(key)
+        self._tidy()
+
+    # The following modifiers are for internal use.
+
+    @abstractmethod
+    def _delete(self, the_key):
+        # Remove the item with the_key, if it exists.
+        # Return True if it existed, otherwise False.
+        raise NotImplementedError
+
+    @abstractmethod
+    def _create_buckets(self, number_of_buckets):
+        # Create the given number of empty buckets.
+        raise NotImplementedError
+
+    @abstractmethod
+    def _resize(self, number_of_buckets):
+        # Put the items in the given number of new buckets.
+        # Assume there are enough buckets for the items.
+        raise NotImplementedError
+
+    def _tidy(self):
+        # After removing items, shrink the table if it has too few items,
+        # and remove the deleted items if there are too many.
+        self._shrink()
+        if self._deleted > _MAX_DELETED * self._number_of_buckets():
+            self.compact()
+
+    def _grow(self, new_items=1):
+        # Double the number of buckets, as often as needed,
+        # if the new items might make the table too full.
+        if self._max_load_factor is None:
+            return
+        used = self._length + self._deleted + new_items
+        buckets = self._number_of_buckets()
+        while used > self._max_load_factor * buckets:
+            buckets = 2 * buckets
+        if buckets > self._number_of_buckets():
+            self._resize(buckets)
+
+    def _shrink(self):
+        # Halve the number of buckets, as often as needed,
+        # if the table has too few items.
+        if self._min_load_factor is None:
+            return
+        buckets = self._number_of_buckets()
+        while (
+            self._length < self._min_load_factor * buckets
+            and buckets // 2 >= self._minimum_buckets
+        ):
+            buckets = buckets // 2
+        if buckets < self._number_of_buckets():
+            self._resize(buckets)
+
+
+class HashTable(BaseHashTable):
+    """Provide a collection of key-value pairs with unique keys.
+
+    Implement a closed hash table that, by default, doesn't grow.
+    Use linear probing for collision resolution, unless told otherwise.
+    Use the built-in hashing function, unless told otherwise.
+    """
+
+    # Representation
+    # --------------
+    # A hash table is represented by three lists of the same length,
+    # one position per bucket: the keys, the values and the keys' hashes.
+    # Keeping the items in parallel lists, instead of a list of pairs,
+    # avoids creating a new pair for each item added.
+    # An empty bucket has key None, whereas a deleted item has value None.
+    # The hashes are stored in an array of 64-bit integers, which takes
+    # less memory than a list. They avoid computing the hash of each key
+    # again when resizing, and comparing keys with different hashes,
+    # as such keys can't be equal.
+    # Resizing creates new lists and adds the items to them,
+    # as their positions depend on the number of buckets.
+    # Deleted items are not added, so resizing also removes them.
+    # Adding a new item reuses the first bucket with a deleted item
+    # found while searching for the key, if there's one.
+    #
+    # The search for a key starts in the bucket given by the key's hash
+    # and moves on by a step that, for quadratic probing, increases by 1
+    # after each bucket tried. Each probing tries every bucket at most once,
+    # so a search stops after trying all buckets.
+    # pylint: disable=too-many-instance-attributes,protected-access
+
+    # Creator
+    # -------
+
+    def __init__(
+        self,
+        number_of_buckets,
+        max_load_factor=None,
+        min_load_factor=None,
+        probing="linear",
+        hash_function=hash,
+    ):
+        """Initialise the table with the given number_of_buckets.
+
+        Assume that the number_of_buckets is positive.
+
+        The load factor is the number of used buckets (with items or
+        deleted items) divided by the number of buckets. The fuller the
+        table, the longer it takes to find a key.
+        If max_load_factor is given, the table doubles its number of buckets
+        whenever an addition would make the load factor exceed it.
+        If min_load_factor is also given, the table halves its number of
+        buckets whenever a removal makes the load factor of the items
+        fall below it, but never to fewer than number_of_buckets.
+        Assume 0 < max_load_factor < 1 and
+        0 < min_load_factor < max_load_factor / 2, so that the table
+        doesn't shrink right after growing or vice versa.
+        If max_load_factor is None, the table doesn't grow nor shrink.
+
+        The probing is how to find another bucket if a bucket is in use:
+
+        - 'linear' tries the next bucket, then the one after, etc.
+        - 'quadratic' tries the next bucket, then the one 2 buckets after,
+          then the one 3 buckets after, etc.
+        - 'double' (for double hashing) skips the same number of buckets
+          each time, but that number depends on the key.
+
+        Quadratic probing and double hashing avoid long sequences of
+        used buckets, but they only try all buckets if their number is
+        a power of 2, so assume that it is.
+
+        The hash_function computes the hash of each key. Assume it returns
+        an integer that fits in 64 bits and returns the same integer for
+        equal keys. Pass `mixed_hash` if the built-in hash function puts
+        many keys in the same buckets, e.g. for integers with equal
+        lower bits.
+        """
+        assert max_load_factor is None or max_load_factor < 1
+        assert probing in _PROBING
+        if probing != "linear":
+            assert number_of_buckets & (number_of_buckets - 1) == 0
+        super().__init__(
+            number_of_buckets,
+            max_load_factor,
+            min_load_factor,
+            hash_function,
+        )
+        self._probing = probing
+
+    # Inspectors
+    # ----------
+
+    def value(self, the_key):
+        """If the table has the_key, return the associated value.
+
+        Otherwise return None.
+        """
+        hash_value = self._hash_function(the_key)
+        buckets = len(self._keys)
+        index, step, increment = self._first_probe(hash_value)
+        # Keep going until we know whether the key exists or not.
+        # If all buckets were tried, the item doesn't exist.
+        for _ in range(buckets):
+            key = self._keys[index]
             # If the bucket is empty, the item doesn't exist.
-            if bucket[_KEY] is None:
-                return
+            if key is None:
+                return None
+            # If the bucket has the key, return the value.
+            if self._hashes[index] == hash_value and key == the_key:
+                return self._values[index]
+            # Otherwise try the next bucket.
+            index = (index + step) % buckets
+            step += increment
+        return None
+
+    def keys(self):
+        """Generate the keys in the table, in no particular order.
+
+        The table must not be changed while the keys are generated.
+        """
+        for index, value in enumerate(self._values):
+            if value is not None:
+                yield self._keys[index]
+
+    def values(self):
+        """Generate the values in the table, in the same order as `keys`.
+
+        The table must not be changed while the values are generated.
+        """
+        for value in self._values:
+            if value is not None:
+                yield value
+
+    def items(self):
+        """Generate the key-value pairs in the table, as tuples.
+
+        The pairs are in the same order as `keys`.
+        The table must not be changed while the pairs are generated.
+        """
+        for index, value in enumerate(self._values):
+            if value is not None:
+                yield (self._keys[index], value)
+
+    def copy(self):
+        """Return a new table with the same items and buckets as this one.
+
+        This is faster than adding the items to a new table,
+        as the buckets are copied as they are.
+        """
+        table = copy.copy(self)
+        table._keys = self._keys[:]
+        table._values = self._values[:]
+        table._hashes = self._hashes[:]
+        return table
+
+    def stats(self):
+        """Return statistics on how the buckets are used.
+
+        Return a dictionary with the following keys and values:
+
+        - 'items': the number of items
+        - 'deleted': the number of deleted items
+        - 'buckets': the number of buckets
+        - 'load_factor': the items and deleted items per bucket
+        - 'deleted_ratio': the deleted items per bucket
+        - 'average_probes': how many buckets are looked at, on average,
+          to find the key of an item (0 if there are no items)
+        - 'maximum_probes': the most buckets looked at to find a key
+        - 'clusters': a dictionary that maps each size to the number of
+          clusters of that size. A cluster is a sequence of consecutive
+          buckets with items or deleted items, between empty buckets.
+
+        The number of items and deleted items is kept up to date, but
+        the probes and the clusters are computed from the buckets,
+        which takes time proportional to the number of buckets.
+        """
+        buckets = len(self._keys)
+        total_probes = 0
+        maximum_probes = 0
+        for index in range(buckets):
+            if self._values[index] is not None:
+                probes = self._probes(self._hashes[index], index)
+                total_probes += probes
+                maximum_probes = max(maximum_probes, probes)
+        # Start counting clusters after an empty bucket,
+        # so that a cluster that wraps around is counted once.
+        clusters = dict()
+        start = 0
+        while start < buckets and self._keys[start] is not None:
+            start += 1
+        if start == buckets:
+            clusters[buckets] = 1
+        else:
+            size = 0
+            for offset in range(1, buckets + 1):
+                if self._keys[(start + offset) % buckets] is None:
+                    if size > 0:
+                        clusters[size] = clusters.get(size, 0) + 1
+                    size = 0
+                else:
+                    size += 1
+        return dict(
+            items=self._length,
+            deleted=self._deleted,
+            buckets=buckets,
+            load_factor=(self._length + self._deleted) / buckets,
+            deleted_ratio=self._deleted / buckets,
+            average_probes=total_probes / max(self._length, 1),
+            maximum_probes=maximum_probes,
+            clusters=clusters,
+        )
+
+    # The following inspectors are for internal use.
+
+    def _number_of_buckets(self):
+        # Return the number of buckets.
+        return len(self._keys)
+
+    def _first_probe(self, hash_value):
+        # Return the index of the first bucket to try for the hash value,
+        # the step to the next bucket, and how much the step increases.
+        buckets = len(self._keys)
+        if self._probing == "linear":
+            return hash_value % buckets, 1, 0
+        if self._probing == "quadratic":
+            return hash_value % buckets, 1, 1
+        # Double hashing takes the step from other bits of the hash value.
+        # The step must be odd to try all buckets.
+        return hash_value % buckets, (hash_value // buckets) % buckets | 1, 0
+
+    def _probes(self, hash_value, the_index):
+        # Return how many buckets are tried to reach the_index
+        # for a key with the given hash value.
+        buckets = len(self._keys)
+        index, step, increment = self._first_probe(hash_value)
+        probes = 1
+        while index != the_index:
+            index = (index + step) % buckets
+            step += increment
+            probes += 1
+        return probes
+
+    def _free_index(self, the_key, hash_value):
+        # Return the index of the bucket where to store the item with the_key.
+        # Return None if the table is full and hasn't the_key.
+        buckets = len(self._keys)
+        index, step, increment = self._first_probe(hash_value)
+        # Remember the first bucket with a deleted item.
+        deleted_index = None
+        for _ in range(buckets):
+            key = self._keys[index]
+            # If the bucket is empty, the table hasn't the_key. Store the item
+            # in the first bucket with a deleted item, or in this one.
+            if key is None:
+                if deleted_index is not None:
+                    return deleted_index
+                return index
+            # If the bucket has the_key, store the item there.
+            if self._hashes[index] == hash_value and key == the_key:
+                return index
+            if self._values[index] is None and deleted_index is None:
+                deleted_index = index
+            index = (index + step) % buckets
+            step += increment
+        # All buckets were tried: the table hasn't the_key and
+        # is full, unless there's a bucket with a deleted item.
+        return deleted_index
+
+    # Modifiers
+    # ---------
+
+    def add(self, the_key, the_value):
+        """Add an item to the table and return if the operation succeeded.
+
+        If there is an item with the_key, replace its value by the_value,
+        otherwise try to add a new item with the_key and the_value.
+        Return True if the item was added.
+        Return False if the_value is None or the table is full.
+        A table with a maximum load factor is never full.
+        """
+        if the_value is None:
+            return False
+        self._grow()
+        hash_value = self._hash_function(the_key)
+        index = self._free_index(the_key, hash_value)
+        if index is None:
+            return False
+        if self._values[index] is None:
+            self._length += 1
+            if self._keys[index] is not None:
+                self._deleted -= 1
+        self._keys[index] = the_key
+        self._values[index] = the_value
+        self._hashes[index] = hash_value
+        return True
+
+    def compact(self):
+        """Remove the deleted items from the table.
+
+        This makes searching for keys that aren't in the table faster.
+        Take time proportional to the number of buckets.
+        """
+        self._resize(self._number_of_buckets())
+
+    # The following modifiers are for internal use.
+
+    def _delete(self, the_key):
+        # Mark the item with the_key as deleted, if it exists.
+        # Return True if it existed, otherwise False.
+        hash_value = self._hash_function(the_key)
+        buckets = len(self._keys)
+        index, step, increment = self._first_probe(hash_value)
+        for _ in range(buckets):
+            key = self._keys[index]
+            # If the bucket is empty, the item doesn't exist.
+            if key is None:
+                return False
             # If the bucket has the key, mark it as deleted.
-            if bucket[_KEY] == the_key:
-                bucket[_VALUE] = None
-                return
-            index = (index + 1) % len(self._buckets)
-            if index == start_index:
-                return
+            if self._hashes[index] == hash_value and key == the_key:
+                if self._values[index] is None:
+                    return False
+                self._values[index] = None
+                self._length -= 1
+                self._deleted += 1
+                return True
+            index = (index + step) % buckets
+            step += increment
+        return False
+
+    def _create_buckets(self, number_of_buckets):
+        # Create the given number of empty buckets.
+        self._keys = [None] * number_of_buckets
+        self._values = [None] * number_of_buckets
+        self._hashes = array("q", [0]) * number_of_buckets
+
+    def _resize(self, number_of_buckets):
+        # Put the items in new lists with the given number of buckets.
+        # Assume there are enough buckets for the items.
+        keys = self._keys
+        values = self._values
+        hashes = self._hashes
+        self._create_buckets(number_of_buckets)
+        self._deleted = 0
+        for index, value in enumerate(values):
+            if value is not None:
+                self._place(keys[index], value, hashes[index])
+
+    def _place(self, the_key, the_value, hash_value):
+        # Put the item in the first empty bucket for its key.
+        # Assume the table hasn't the key and has an empty bucket.
+        # As the key is new, there's no need to compare keys.
+        buckets = len(self._keys)
+        index, step, increment = self._first_probe(hash_value)
+        while self._keys[index] is not None:
+            index = (index + step) % buckets
+            step += increment
+        self._keys[index] = the_key
+        self._values[index] = the_value
+        self._hashes[index] = hash_value
+
+
+class RobinHoodHashTable(HashTable):
+    """Provide a collection of key-value pairs with unique keys.
+
+    Implement a closed hash table with linear probing and
+    Robin Hood hashing: a new item takes the bucket of any item that is
+    closer to its hash bucket, which moves one bucket forward.
+    This 'takes from the rich', keeping all items about equally close to
+    their hash buckets. A search can stop as soon as it reaches an item
+    closer to its hash bucket than the key would be in that bucket.
+    Removing an item moves the following items back, instead of
+    marking the item as deleted.
+    """
+
+    # Representation
+    # --------------
+    # The representation is the same as for HashTable,
+    # but there are no deleted items.
+    # In each sequence of consecutive used buckets, the items are
+    # in the same order as their hash buckets, so an item's distance
+    # from its hash bucket is at least the previous item's distance minus 1.
+
+    # Creator
+    # -------
+
+    def __init__(
+        self,
+        number_of_buckets,
+        max_load_factor=None,
+        min_load_factor=None,
+        hash_function=hash,
+    ):
+        """Initialise the table with the given number_of_buckets.
+
+        Assume that the number_of_buckets is positive.
+        The load factors and hash function are as for HashTable.
+        """
+        super().__init__(
+            number_of_buckets,
+            max_load_factor,
+            min_load_factor,
+            hash_function=hash_function,
+        )
+
+    # Inspectors
+    # ----------
+
+    def value(self, the_key):
+        """If the table has the_key, return the associated value.
+
+        Otherwise return None.
+        """
+        index = self._index(the_key, self._hash_function(the_key))
+        if index is None:
+            return None
+        return self._values[index]
+
+    # The following inspectors are for internal use.
+
+    def _distance(self, index):
+        # Return how far the item at index is from its hash bucket.
+        return (index - self._hashes[index]) % len(self._keys)
+
+    def _index(self, the_key, hash_value):
+        # Return the index of the bucket with the_key, or None if not found.
+        buckets = len(self._keys)
+        index = hash_value % buckets
+        for distance in range(buckets):
+            key = self._keys[index]
+            # If the bucket is empty or its item is closer to its hash
+            # bucket, the_key would be here, so the item doesn't exist.
+            if key is None or self._distance(index) < distance:
+                return None
+            if self._hashes[index] == hash_value and key == the_key:
+                return index
+            index = (index + 1) % buckets
+        return None
+
+    # Modifiers
+    # ---------
+
+    def add(self, the_key, the_value):
+        """Add an item to the table and return if the operation succeeded.
+
+        If there is an item with the_key, replace its value by the_value,
+        otherwise try to add a new item with the_key and the_value.
+        Return True if the item was added.
+        Return False if the_value is None or the table is full.
+        A table with a maximum load factor is never full.
+        """
+        if the_value is None:
+            return False
+        hash_value = self._hash_function(the_key)
+        index = self._index(the_key, hash_value)
+        if index is not None:
+            self._values[index] = the_value
+            return True
+        self._grow()
+        if self._length == len(self._keys):
+            return False
+        self._place(the_key, the_value, hash_value)
+        self._length += 1
+        return True
+
+    # The following modifiers are for internal use.
+
+    def _delete(self, the_key):
+        # Remove the item with the_key, if it exists.
+        # Return True if it existed, otherwise False.
+        index = self._index(the_key, self._hash_function(the_key))
+        if index is None:
+            return False
+        # Move each following item one bucket back, until reaching
+        # an empty bucket or an item that is in its hash bucket.
+        buckets = len(self._keys)
+        next_index = (index + 1) % buckets
+        while self._keys[next_index] is not None:
+            if self._distance(next_index) == 0:
+                break
+            self._keys[index] = self._keys[next_index]
+            self._values[index] = self._values[next_index]
+            self._hashes[index] = self._hashes[next_index]
+            index = next_index
+            next_index = (index + 1) % buckets
+        self._keys[index] = None
+        self._values[index] = None
+        self._length -= 1
+        return True
+
+    def _place(self, the_key, the_value, hash_value):
+        # Put the item in the first bucket that is empty or has an item
+        # closer to its hash bucket. Move that item and the following ones,
+        # up to an empty bucket, one bucket forward.
+        # Assume the table hasn't the key and has an empty bucket.
+        buckets = len(self._keys)
+        index = hash_value % buckets
+        distance = 0
+        while self._keys[index] is not None:
+            if self._distance(index) < distance:
+                break
+            index = (index + 1) % buckets
+            distance += 1
+        key = the_key
+        value = the_value
+        while key is not None:
+            self._keys[index], key = key, self._keys[index]
+            self._values[index], value = value, self._values[index]
+            self._hashes[index], hash_value = hash_value, self._hashes[index]
+            index = (index + 1) % buckets
+
+
+class ChainedHashTable(BaseHashTable):
+    """Provide a collection of key-value pairs with unique keys.
+
+    Implement an open hash table, with separate chaining:
+    each bucket has a chain of the items whose keys hash to that bucket.
+    Unlike a closed hash table, it's never full and the load factor,
+    i.e. the number of items divided by the number of buckets,
+    can be larger than 1.
+    Use the built-in hashing function, unless told otherwise.
+    """
+
+    # Representation
+    # --------------
+    # A chained hash table is represented by a list of buckets.
+    # An empty bucket is None, otherwise it's the chain, represented by
+    # a list with the hash, key and value of each item, one after the other.
+    # Keeping the items in one list per bucket, instead of a linked list,
+    # avoids creating a node per item. As the chains are short,
+    # going through them is fast.
+    # Removing an item removes it from its chain, so there are no
+    # deleted items. Resizing puts each item in its new chain.
+    # pylint: disable=too-many-instance-attributes,protected-access
+
+    # Creator
+    # -------
+
+    def __init__(
+        self,
+        number_of_buckets,
+        max_load_factor=None,
+        min_load_factor=None,
+        max_chain_length=None,
+        hash_function=hash,
+    ):
+        """Initialise the table with the given number_of_buckets.
+
+        Assume that the number_of_buckets is positive.
+
+        If max_load_factor is given, the table doubles its number of buckets
+        whenever an addition would make the load factor exceed it.
+        If min_load_factor is also given, the table halves its number of
+        buckets whenever a removal makes the load factor fall below it,
+        but never to fewer than number_of_buckets.
+        Assume max_load_factor is positive and
+        0 < min_load_factor < max_load_factor / 2.
+
+        If max_chain_length is given, the table doubles its number of
+        buckets whenever an addition makes a chain longer than that,
+        provided the table has at least as many items as buckets.
+        Long chains in emptier tables are due to keys with the same hash,
+        which more buckets wouldn't separate.
+        Assume max_chain_length is positive.
+
+        The hash_function is as for HashTable.
+        """
+        assert max_chain_length is None or max_chain_length > 0
+        super().__init__(
+            number_of_buckets,
+            max_load_factor,
+            min_load_factor,
+            hash_function,
+        )
+        self._max_chain_length = max_chain_length
+
+    # Inspectors
+    # ----------
+
+    def value(self, the_key):
+        """If the table has the_key, return the associated value.
+
+        Otherwise return None.
+        """
+        hash_value = self._hash_function(the_key)
+        chain = self._chains[hash_value % len(self._chains)]
+        index = self._position(chain, the_key, hash_value)
+        if index is None:
+            return None
+        return chain[index + _VALUE]
+
+    def keys(self):
+        """Generate the keys in the table, in no particular order.
+
+        The table must not be changed while the keys are generated.
+        """
+        for chain in self._chains:
+            if chain is not None:
+                yield from chain[_KEY::_ITEM_LENGTH]
+
+    def values(self):
+        """Generate the values in the table, in the same order as `keys`.
+
+        The table must not be changed while the values are generated.
+        """
+        for chain in self._chains:
+            if chain is not None:
+                yield from chain[_VALUE::_ITEM_LENGTH]
+
+    def items(self):
+        """Generate the key-value pairs in the table, as tuples.
+
+        The pairs are in the same order as `keys`.
+        The table must not be changed while the pairs are generated.
+        """
+        for chain in self._chains:
+            if chain is not None:
+                keys = chain[_KEY::_ITEM_LENGTH]
+                values = chain[_VALUE::_ITEM_LENGTH]
+                yield from zip(keys, values)
+
+    def copy(self):
+        """Return a new table with the same items and buckets as this one.
+
+        This is faster than adding the items to a new table,
+        as the chains are copied as they are.
+        """
+        table = copy.copy(self)
+        table._chains = [chain and chain[:] for chain in self._chains]
+        return table
+
+    def stats(self):
+        """Return statistics on how the buckets are used.
+
+        Return a dictionary with the same keys as for HashTable.
+        The 'deleted' and 'deleted_ratio' are zero and
+        the 'load_factor' is the number of items per bucket.
+        The probes to find a key are the items in its chain up to the key.
+        The 'clusters' dictionary maps each length to the number of
+        chains of that length.
+        Take time proportional to the number of buckets.
+        """
+        buckets = len(self._chains)
+        total_probes = 0
+        maximum_probes = 0
+        clusters = dict()
+        for chain in self._chains:
+            if chain is not None:
+                length = len(chain) // _ITEM_LENGTH
+                # Finding the 1st, 2nd, ... item takes 1, 2, ... probes.
+                total_probes += length * (length + 1) // 2
+                maximum_probes = max(maximum_probes, length)
+                clusters[length] = clusters.get(length, 0) + 1
+        return dict(
+            items=self._length,
+            deleted=0,
+            buckets=buckets,
+            load_factor=self._length / buckets,
+            deleted_ratio=0,
+            average_probes=total_probes / max(self._length, 1),
+            maximum_probes=maximum_probes,
+            clusters=clusters,
+        )
+
+    # The following inspectors are for internal use.
+
+    def _number_of_buckets(self):
+        # Return the number of buckets.
+        return len(self._chains)
+
+    def _position(self, chain, the_key, hash_value):
+        # Return the position in the chain of the item with the_key,
+        # or None if the chain (which may be None) hasn't the_key.
+        if chain is not None:
+            for index in range(0, len(chain), _ITEM_LENGTH):
+                if chain[index + _HASH] != hash_value:
+                    continue
+                if chain[index + _KEY] == the_key:
+                    return index
+        return None
+
+    # Modifiers
+    # ---------
+
+    def add(self, the_key, the_value):
+        """Add an item to the table and return if the operation succeeded.
+
+        If there is an item with the_key, replace its value by the_value,
+        otherwise add a new item with the_key and the_value.
+        Return True if the item was added.
+        Return False if the_value is None.
+        """
+        if the_value is None:
+            return False
+        self._grow()
+        hash_value = self._hash_function(the_key)
+        bucket = hash_value % len(self._chains)
+        chain = self._chains[bucket]
+        if chain is None:
+            self._chains[bucket] = [hash_value, the_key, the_value]
+            self._length += 1
+            return True
+        index = self._position(chain, the_key, hash_value)
+        if index is not None:
+            chain[index + _VALUE] = the_value
+            return True
+        chain.extend((hash_value, the_key, the_value))
+        self._length += 1
+        # If the chain is too long, try to spread its items.
+        if (
+            self._max_chain_length is not None
+            and len(chain) > self._max_chain_length * _ITEM_LENGTH
+            and self._length >= len(self._chains)
+        ):
+            self._resize(2 * len(self._chains))
+        return True
+
+    def compact(self):
+        """Do nothing, as a chained hash table has no deleted items."""
+
+    # The following modifiers are for internal use.
+
+    def _delete(self, the_key):
+        # Remove the item with the_key from its chain, if it exists.
+        # Return True if it existed, otherwise False.
+        hash_value = self._hash_function(the_key)
+        bucket = hash_value % len(self._chains)
+        chain = self._chains[bucket]
+        index = self._position(chain, the_key, hash_value)
+        if index is None:
+            return False
+        end = index + _ITEM_LENGTH
+        del chain[index:end]
+        if not chain:
+            self._chains[bucket] = None
+        self._length -= 1
+        return True
+
+    def _create_buckets(self, number_of_buckets):
+        # Create a list with the given number of empty buckets.
+        self._chains = [None] * number_of_buckets
+
+    def _resize(self, number_of_buckets):
+        # Put the items in a new list with the given number of buckets.
+        chains = self._chains
+        self._create_buckets(number_of_buckets)
+        for chain in chains:
+            if chain is not None:
+                for index in range(0, len(chain), _ITEM_LENGTH):
+                    end = index + _ITEM_LENGTH
+                    item = chain[index:end]
+                    bucket = item[_HASH] % number_of_buckets
+                    if self._chains[bucket] is None:
+                        self._chains[bucket] = item
+                    else:
+                        self._chains[bucket].extend(item)
 
 
 # Exercises
 # ---------
-# - Change the implementation to use quadratic probing.
-# - Write a method that calculates the load factor of a table.
+# - Change `stats` to also return the average number of buckets looked at
+#   when searching for a key that isn't in the table.
+# - Explain why quadratic probing may not try all buckets
+#   if their number isn't a power of 2.
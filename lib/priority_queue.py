@@ -1,9 +1,10 @@
-"""An implementation of a priority queue (min binary heap)."""
+"""An implementation of a priority queue (min binary or d-ary heap)."""
 
 # The following constants make the code more readable.
 
 _KEY = 0  # pylint: disable=invalid-name
 _VALUE = 1  # pylint: disable=invalid-name
+_SEQUENCE = 2  # pylint: disable=invalid-name
 
 
 class PriorityQueue:
@@ -14,6 +15,9 @@ class PriorityQueue:
     A **smaller** value means a **higher** priority, e.g.
     priority 1 is higher than priority 2,
     priority 'A' is higher than priority 'B'.
+    Items must be hashable. Items should be unique, otherwise
+    checking if the queue has an item, changing its priority and
+    removing it may not work.
     """
 
     # Representation
@@ -28,7 +32,28 @@ class PriorityQueue:
     # then its children (if they exist), must be at positions 2n and 2n+1.
     # Conversely, if a node is at position n, its parent is at n // 2.
     #
+    # More generally, in a d-ary heap each node has up to d children.
+    # The children of the node at position n are at positions
+    # d(n-1)+2 to d(n-1)+d+1, and its parent is at (n-2) // d + 1.
+    # For d = 2, these are the positions above.
+    # A wider heap is shallower, so moving a node up is faster,
+    # but moving a node down compares more children at each level.
+    #
     # Each heap node is a list of length 2 (key and value).
+    # In a stable queue, each node also has a sequence number, which is
+    # larger for nodes added later. Of two nodes with the same key, the one
+    # with the smaller sequence number is considered to be smaller.
+    # To compare two nodes, their sequence numbers are compared first,
+    # as they're never equal. If node A was added before node B,
+    # A is smaller than B if B's key isn't smaller than A's key.
+    # If A was added after B, A is smaller than B if A's key is smaller
+    # than B's key. Either way, the keys are compared once, like in an
+    # unstable queue. Comparing the sequence numbers, which are integers,
+    # is the only extra cost.
+    #
+    # To find a node quickly, a dictionary maps each value to
+    # the position of its node. The methods that move nodes
+    # update the dictionary.
     #
     # For a priority queue the key is the priority and the value is the item.
     # The method signatures and docstrings refer to
@@ -39,20 +64,38 @@ class PriorityQueue:
     # Creator
     # -------
 
-    def __init__(self, pairs=None):
+    def __init__(self, pairs=None, arity=2, stable=False):
         """Initialise the queue with a list of priority-item pairs.
 
         If no pairs are given, the queue starts empty.
+        The arity is the maximum number of children of each heap node.
+        A larger arity makes adding items and increasing their priority
+        faster, but removing items slower. Assume the arity is at least 2.
+
+        If stable is True, items with the same priority are removed
+        in the order they were added, first in, first out.
+        The pairs are considered to be added in the order given.
+        Changing the priority of an item doesn't change when it was added.
+        If stable is False, items with the same priority are removed
+        in any order. A stable queue compares priorities as often as
+        an unstable one, but also compares when items were added, so
+        it's slower if priorities are quick to compare, e.g. integers.
         """
+        assert arity >= 2
+        self._arity = arity
+        self._stable = stable
+        self._sequence = 0
         # Position 0 is just a filler to start the heap at position 1.
         self._nodes = [None]
-        if pairs is not None:
+        if stable and pairs is not None:
+            for priority, item in pairs:
+                self._nodes.append(self._new_node(priority, item))
+        elif pairs is not None:
             self._nodes = self._nodes + pairs
-        # The leaves have no children, so they obey the ordering property.
-        # Therefore start with the last non-leaf node,
-        # and go up to the root, putting each node in its correct position.
-        for current in range(self.size() // 2, 0, -1):
-            self._bubble_down(current)
+        self._positions = dict()
+        for position in range(1, len(self._nodes)):
+            self._positions[self._nodes[position][_VALUE]] = position
+        self._heapify()
 
     # Inspectors
     # ----------
@@ -74,58 +117,184 @@ class PriorityQueue:
         # In a min heap, a smallest key (= highest priority) is in the root.
         return self._nodes[1][_VALUE]
 
-    # The following inspectors are for internal use.
+    def __contains__(self, item):
+        """Implement the `in` operator for priority queues.
+
+        Return True if the queue has the item, otherwise False.
+        """
+        return item in self._positions
+
+    def nsmallest(self, number):
+        """Return a list of the given number of items with highest priority.
+
+        The items are in order of priority, and remain in the queue.
+        Assume 0 <= number <= size of the queue.
+        Take time proportional to number * log(number).
+        """
+        assert 0 <= number <= self.size()
+        result = []
+        if number == 0:
+            return result
+        # Visit the heap nodes in order of their keys, using another
+        # priority queue with the positions of the nodes to visit next.
+        # A node is visited only after its parent, so start with the root.
+        # In a stable queue, nodes with the same key are visited
+        # in order of their sequence numbers.
+        to_visit = PriorityQueue([[self._sort_key(1), 1]])
+        last = self.size()
+        while len(result) < number:
+            position = to_visit.dequeue()
+            result.append(self._nodes[position][_VALUE])
+            first = self._arity * (position - 1) + 2
+            for child in range(first, min(first + self._arity, last + 1)):
+                to_visit.enqueue(child, self._sort_key(child))
+        return result
 
-    def _exists(self, position):
-        # Check if the position is valid.
-        return 1 <= position <= self.size()
+    # The following inspector is for internal use.
 
-    def _less(self, position1, position2):
-        # Check if position1 has a smaller key than position2.
-        return self._nodes[position1][_KEY] < self._nodes[position2][_KEY]
+    def _sort_key(self, position):
+        # Return what to compare to order the node at the position
+        # among all nodes, without using the heap.
+        node = self._nodes[position]
+        if self._stable:
+            return (node[_KEY], node[_SEQUENCE])
+        return node[_KEY]
 
     # Modifiers
     # ---------
 
     # The following modifiers are for internal use.
 
-    def _exchange(self, position1, position2):
-        # Exchange the nodes at the two positions.
-        temporary = self._nodes[position1]
-        self._nodes[position1] = self._nodes[position2]
-        self._nodes[position2] = temporary
+    def _new_node(self, priority, item):
+        # Return a new node, with the next sequence number if stable.
+        if not self._stable:
+            return [priority, item]
+        self._sequence += 1
+        return [priority, item, self._sequence]
 
-    # The following are called bubble up/down because they swap
+    def _remove(self, position):
+        # Remove the node at the position and return its value.
+        node = self._nodes[position]
+        # If the values aren't unique, the value may have been removed.
+        self._positions.pop(node[_VALUE], None)
+        # Replace the node by the last leaf, unless it's the last leaf.
+        last = self._nodes.pop()
+        if position <= self.size():
+            self._nodes[position] = last
+            # Move the last leaf down or up the heap to its proper place.
+            self._bubble_down(position)
+            self._bubble_up(position)
+        return node[_VALUE]
+
+    def _replace_root(self, item, priority):
+        # Replace the root by a new node and return the root's value.
+        value = self._nodes[1][_VALUE]
+        # If the values aren't unique, the value may have been removed.
+        self._positions.pop(value, None)
+        self._nodes[1] = self._new_node(priority, item)
+        # Move the new node down the heap to its proper place.
+        self._bubble_down(1)
+        return value
+
+    def _heapify(self):
+        # Put each node in its correct position.
+        # The leaves have no children, so they obey the ordering property.
+        # Therefore start with the last non-leaf node,
+        # and go up to the root, putting each node in its correct position.
+        last_parent = (self.size() - 2) // self._arity + 1
+        for current in range(last_parent, 0, -1):
+            self._bubble_down(current)
+
+    # The following are called bubble up/down because they move
     # 'adjacent' (i.e. parent-child) nodes, similarly to Bubble Sort.
     # Other names typically used are percolate up/down and sift up/down.
+    # Instead of swapping the node with its parent or child at each level,
+    # they take the node out, leaving a 'hole', and move the parent or
+    # child into the hole. The node is put in the final hole.
+    # This does one assignment per level instead of three.
 
     def _bubble_up(self, current):
         # Move the node at the current position upwards to its correct place.
-        parent = current // 2
-        # If the node has a parent that has a larger key,
-        if self._exists(parent) and self._less(current, parent):
-            # swap it with the parent
-            self._exchange(current, parent)
-            # and continue to move it further up.
-            self._bubble_up(parent)
+        nodes = self._nodes
+        positions = self._positions
+        arity = self._arity
+        stable = self._stable
+        node = nodes[current]
+        key = node[_KEY]
+        sequence = node[_SEQUENCE] if stable else None
+        # While the node has a parent that is larger,
+        while current > 1:
+            parent = (current - 2) // arity + 1
+            parent_node = nodes[parent]
+            if stable and sequence < parent_node[_SEQUENCE]:
+                larger = not parent_node[_KEY] < key
+            else:
+                larger = key < parent_node[_KEY]
+            if not larger:
+                break
+            # move the parent down into the hole
+            nodes[current] = parent_node
+            positions[parent_node[_VALUE]] = current
+            # and continue from the parent's position.
+            current = parent
+        nodes[current] = node
+        positions[node[_VALUE]] = current
 
+    # pylint: disable-next=too-many-locals,too-many-branches,too-complex
     def _bubble_down(self, current):
         # Move the node at the current position downwards to its correct place.
-        left = current * 2
-        # If the node is not a leaf,
-        if self._exists(left):
+        nodes = self._nodes
+        positions = self._positions
+        arity = self._arity
+        stable = self._stable
+        last = len(nodes) - 1
+        node = nodes[current]
+        key = node[_KEY]
+        sequence = node[_SEQUENCE] if stable else None
+        first = arity * (current - 1) + 2
+        # While the node is not a leaf,
+        while first <= last:
             # compute its smallest child.
-            right = left + 1
-            if self._exists(right) and self._less(right, left):
-                smallest = right
+            smallest = first
+            child = nodes[first]
+            if arity == 2:
+                # This is the most common case, so avoid the loop.
+                right = first + 1
+                if right <= last:
+                    other = nodes[right]
+                    if stable and other[_SEQUENCE] < child[_SEQUENCE]:
+                        smaller = not child[_KEY] < other[_KEY]
+                    else:
+                        smaller = other[_KEY] < child[_KEY]
+                    if smaller:
+                        smallest = right
+                        child = other
+            else:
+                end = min(first + arity, last + 1)
+                for position in range(first + 1, end):
+                    other = nodes[position]
+                    if stable and other[_SEQUENCE] < child[_SEQUENCE]:
+                        smaller = not child[_KEY] < other[_KEY]
+                    else:
+                        smaller = other[_KEY] < child[_KEY]
+                    if smaller:
+                        smallest = position
+                        child = other
+            # If the child isn't smaller than the node, stop.
+            if stable and child[_SEQUENCE] < sequence:
+                smaller = not key < child[_KEY]
             else:
-                smallest = left
-            # If the child is smaller than the node,
-            if self._less(smallest, current):
-                # swap it with that child
-                self._exchange(smallest, current)
-                # and continue to move it down.
-                self._bubble_down(smallest)
+                smaller = child[_KEY] < key
+            if not smaller:
+                break
+            # Otherwise move the child up into the hole
+            nodes[current] = child
+            positions[child[_VALUE]] = current
+            # and continue from the child's position.
+            current = smallest
+            first = arity * (current - 1) + 2
+        nodes[current] = node
+        positions[node[_VALUE]] = current
 
     # The following modifiers are for public use.
 
@@ -135,7 +304,7 @@ class PriorityQueue:
         Return nothing.
         """
         # Add the node as the last leaf of the heap.
-        self._nodes.append([priority, item])
+        self._nodes.append(self._new_node(priority, item))
         # Move it up the heap to its proper place.
         self._bubble_up(self.size())
 
@@ -145,13 +314,8 @@ class PriorityQueue:
         Assume the heap is not empty.
         """
         assert self.size() > 0
-        item = self.front()
-        # Replace the root by the last leaf.
-        self._nodes[1] = self._nodes[-1]
-        self._nodes.pop()
-        # Move it down the heap to its proper place.
-        self._bubble_down(1)
-        return item
+        # In a min heap, a smallest key (= highest priority) is in the root.
+        return self._remove(1)
 
     def set_priority(self, item, priority):
         """Change the item's priority to the new value. Return nothing.
@@ -159,15 +323,75 @@ class PriorityQueue:
         Do nothing if the item isn't in the queue.
         Assume items are unique.
         """
-        # Do a linear search to find the node with the item.
-        for index in range(1, len(self._nodes)):
-            if self._nodes[index][_VALUE] == item:
-                key = self._nodes[index][_KEY]
-                self._nodes[index][_KEY] = priority
-                # If the key has increased, move the node down, otherwise up.
-                if key < priority:
-                    self._bubble_down(index)
-                else:
-                    self._bubble_up(index)
-                # Stop the search.
-                break
+        index = self._positions.get(item)
+        if index is not None:
+            key = self._nodes[index][_KEY]
+            self._nodes[index][_KEY] = priority
+            # If the key has increased, move the node down, otherwise up.
+            if key < priority:
+                self._bubble_down(index)
+            else:
+                self._bubble_up(index)
+
+    def remove(self, item):
+        """Remove the item from the queue. Return nothing.
+
+        Do nothing if the item isn't in the queue.
+        Assume items are unique.
+        """
+        index = self._positions.get(item)
+        if index is not None:
+            self._remove(index)
+
+    # The following modifiers do the work of several of the above.
+
+    def enqueue_many(self, pairs):
+        """Add the priority-item pairs to the queue. Return nothing.
+
+        The pairs are as for the creator. If there are more pairs than
+        items in the queue, it's faster to add them all and then
+        put the nodes in order, as done by the creator.
+        """
+        pairs = list(pairs)
+        if len(pairs) > self.size():
+            for priority, item in pairs:
+                self._positions[item] = len(self._nodes)
+                self._nodes.append(self._new_node(priority, item))
+            self._heapify()
+        else:
+            for priority, item in pairs:
+                self.enqueue(item, priority)
+
+    def dequeue_many(self, number):
+        """Remove and return the given number of items with highest priority.
+
+        Return a list with the items in the order they were removed.
+        Assume 0 <= number <= size of the queue.
+        """
+        assert 0 <= number <= self.size()
+        return [self.dequeue() for _ in range(number)]
+
+    def pushpop(self, item, priority):
+        """Add the item and then remove and return the highest priority item.
+
+        This is faster than calling `enqueue` and then `dequeue`.
+        If the item has at least the highest priority in the queue,
+        return it without adding it.
+        """
+        if self.is_empty():
+            return item
+        # In a stable queue, the root was added before the item,
+        # so the root is removed first if they have the same priority.
+        key = self._nodes[1][_KEY]
+        if priority < key or not self._stable and not key < priority:
+            return item
+        return self._replace_root(item, priority)
+
+    def replace(self, item, priority):
+        """Remove and return the highest priority item and then add the item.
+
+        This is faster than calling `dequeue` and then `enqueue`.
+        Assume the queue is not empty.
+        """
+        assert not self.is_empty()
+        return self._replace_root(item, priority)
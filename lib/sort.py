@@ -211,13 +211,16 @@ def quick_sorted(items):
 
 def heap_sorted(items):
     """Return a list of all items, in non-decreasing order."""
+    items = list(items)
     result = []
     queue = PriorityQueue()
-    for item in items:
-        # Items are ordered by priority, so each item is its own priority.
-        queue.enqueue(item, item)
+    # Items are ordered by priority, so each item is its own priority.
+    # The queue holds the positions of the items, which are unique and
+    # hashable, whereas the items may not be.
+    for position, item in enumerate(items):
+        queue.enqueue(position, item)
     while not queue.is_empty():
-        result.append(queue.dequeue())
+        result.append(items[queue.dequeue()])
     return result
 
 
@@ -1,9 +1,17 @@
 """Unit tests for binary search trees."""
 
-from lib.bst import BinarySearchTree
+import math
+import sys
+
+import pytest
+
+from lib.bst import BalancedSearchTree, BinarySearchTree, PersistentSearchTree
 
 
 class TestBST:
+    # The class of the trees to test.
+    tree_class = BinarySearchTree
+
     def setup_method(self):
         # The keys are unique house numbers in a street.
         # The values are the names of inhabitants.
@@ -11,26 +19,57 @@ class TestBST:
         self.people = ["Jane", "John", "Ann", "Bob", "John"]
         # Create trees for the tests to use.
         # A brand new tree.
-        self.new = BinarySearchTree()
+        self.new = self.tree_class()
         # An empty tree. Tests removal of single node.
-        self.empty = BinarySearchTree()
+        self.empty = self.tree_class()
         self.empty.add(self.houses[0], self.people[0])
         self.empty.remove(self.houses[0])
         # Tree with a single node, with highest key.
-        self.root = BinarySearchTree()
+        self.root = self.tree_class()
         self.root.add(self.houses[-1], self.people[-1])
         # Unbalanced tree: add the keys in ascending order.
-        self.linear = BinarySearchTree()
+        self.linear = self.tree_class()
         for house, person in zip(self.houses, self.people):
             self.linear.add(house, person)
         # Balanced tree: first add the median key.
-        self.balanced = BinarySearchTree()
+        self.balanced = self.tree_class()
         self.balanced.add(33, "Ann")
         self.balanced.add(34, "Bob")
         self.balanced.add(35, "John")
         self.balanced.add(32, "John")
         self.balanced.add(31, "Jane")
 
+    def test_from_sorted(self):
+        pairs = list(zip(self.houses, self.people))
+        tree = self.tree_class.from_sorted(pairs)
+        assert isinstance(tree, self.tree_class)
+        # The middle key is in the root.
+        assert tree.pre_order() == [33, 32, 31, 35, 34]
+        assert tree.height() == 3
+        assert len(tree) == 5
+        for key, value in pairs:
+            assert tree.value(key) == value
+        # The tree can be changed after it's built.
+        tree.add(36, "Jim")
+        tree.remove(33)
+        assert tree.in_order() == [31, 32, 34, 35, 36]
+        assert self.tree_class.from_sorted([]).is_empty()
+
+    def test_from_sorted_is_balanced(self):
+        n = 2**12 - 1
+        tree = self.tree_class.from_sorted([(key, key) for key in range(n)])
+        assert tree.height() == 12
+        assert tree.in_order() == list(range(n))
+
+    def test_from_pairs(self):
+        # Pairs in any order, with a repeated key: the last value counts.
+        pairs = [(33, "Ann"), (35, "Jim"), (31, "Jane"), (35, "John")]
+        tree = self.tree_class.from_pairs(pairs)
+        assert tree.in_order() == [31, 33, 35]
+        assert tree.value(35) == "John"
+        assert tree.height() == 2
+        assert self.tree_class.from_pairs([]).is_empty()
+
     def test_is_empty(self):
         assert self.new.is_empty()
         assert self.empty.is_empty()
@@ -38,6 +77,46 @@ class TestBST:
         assert not self.linear.is_empty()
         assert not self.balanced.is_empty()
 
+    def test_len(self):
+        assert len(self.new) == 0
+        assert len(self.empty) == 0
+        assert len(self.root) == 1
+        assert len(self.linear) == 5
+        assert len(self.balanced) == 5
+        # Replacing a value doesn't change the length.
+        self.linear.add(33, "Ann")
+        assert len(self.linear) == 5
+        # Removing the root, with two children, or a non-existing key.
+        self.balanced.remove(33)
+        self.balanced.remove(33)
+        assert len(self.balanced) == 4
+
+    def test_rank(self):
+        assert self.new.rank(33) == 0
+        assert self.empty.rank(33) == 0
+        assert self.root.rank(35) == 0
+        assert self.root.rank(36) == 1
+        for tree in [self.linear, self.balanced]:
+            for rank, key in enumerate(self.houses):
+                assert tree.rank(key) == rank
+            assert tree.rank(30) == 0
+            assert tree.rank(33.5) == 3
+            assert tree.rank(36) == 5
+
+    def test_select(self):
+        assert self.new.select(0) is None
+        assert self.empty.select(0) is None
+        assert self.root.select(0) == 35
+        assert self.root.select(1) is None
+        for tree in [self.linear, self.balanced]:
+            for rank, key in enumerate(self.houses):
+                assert tree.select(rank) == key
+            assert tree.select(-1) is None
+            assert tree.select(5) is None
+        # Sizes are kept up to date when nodes are removed.
+        self.balanced.remove(33)
+        assert self.balanced.select(2) == 34
+
     def test_height(self):
         assert self.new.height() == 0
         assert self.empty.height() == 0
@@ -52,6 +131,59 @@ class TestBST:
         assert self.linear.smallest_key() == self.houses[0]
         assert self.balanced.smallest_key() == self.houses[0]
 
+    def test_largest_key(self):
+        assert self.new.largest_key() is None
+        assert self.empty.largest_key() is None
+        assert self.root.largest_key() == self.houses[-1]
+        assert self.linear.largest_key() == self.houses[-1]
+        assert self.balanced.largest_key() == self.houses[-1]
+
+    def test_floor_and_ceiling(self):
+        assert self.new.floor(33) is None
+        assert self.empty.ceiling(33) is None
+        assert self.root.floor(33) is None
+        assert self.root.ceiling(33) == 35
+        for tree in [self.linear, self.balanced]:
+            # Keys in the tree are their own floor and ceiling.
+            for key in self.houses:
+                assert tree.floor(key) == key
+                assert tree.ceiling(key) == key
+            assert tree.floor(30) is None
+            assert tree.floor(36) == 35
+            assert tree.floor(33.5) == 33
+            assert tree.ceiling(30) == 31
+            assert tree.ceiling(36) is None
+            assert tree.ceiling(33.5) == 34
+
+    def test_predecessor_and_successor(self):
+        assert self.new.predecessor(33) is None
+        assert self.empty.successor(33) is None
+        assert self.root.predecessor(35) is None
+        assert self.root.successor(33) == 35
+        for tree in [self.linear, self.balanced]:
+            assert tree.predecessor(31) is None
+            assert tree.predecessor(33) == 32
+            assert tree.predecessor(33.5) == 33
+            assert tree.predecessor(40) == 35
+            assert tree.successor(35) is None
+            assert tree.successor(33) == 34
+            assert tree.successor(32.5) == 33
+            assert tree.successor(20) == 31
+
+    def test_range(self):
+        assert list(self.new.range(31, 35)) == []
+        assert list(self.empty.range(31, 35)) == []
+        assert list(self.root.range(31, 34)) == []
+        assert list(self.root.range(31, 35)) == [35]
+        for tree in [self.linear, self.balanced]:
+            assert list(tree.range(31, 35)) == self.houses
+            assert list(tree.range(0, 100)) == self.houses
+            assert list(tree.range(32, 34)) == [32, 33, 34]
+            assert list(tree.range(31.5, 33.5)) == [32, 33]
+            assert list(tree.range(33, 33)) == [33]
+            assert list(tree.range(34, 32)) == []
+            assert list(tree.range(36, 40)) == []
+
     def test_in_order(self):
         assert self.new.in_order() == []
         assert self.empty.in_order() == []
@@ -66,6 +198,18 @@ class TestBST:
         assert self.linear.post_order() == [35, 34, 33, 32, 31]
         assert self.balanced.post_order() == [31, 32, 35, 34, 33]
 
+    def test_iterators(self):
+        # The generators produce the same keys as the list traversals.
+        for tree in [self.new, self.empty, self.root, self.linear, self.balanced]:
+            assert list(tree.iter_in_order()) == tree.in_order()
+            assert list(tree.iter_pre_order()) == tree.pre_order()
+            assert list(tree.iter_post_order()) == tree.post_order()
+            assert list(tree) == tree.in_order()
+        # A traversal can be stopped early.
+        keys = iter(self.balanced)
+        assert next(keys) == self.houses[0]
+        assert next(keys) == self.houses[1]
+
     def test_value(self):
         for key, value in zip(self.houses, self.people):
             assert self.new.value(key) is None
@@ -91,6 +235,101 @@ class TestBST:
         # Test retrieval of the new values.
         self.test_value()
 
+    def test_pop_min_and_max(self):
+        assert self.root.pop_min() == (35, "John")
+        assert self.root.is_empty()
+        for tree in [self.linear, self.balanced]:
+            assert tree.pop_min() == (31, "Jane")
+            assert tree.pop_max() == (35, "John")
+            assert tree.pop_min() == (32, "John")
+            assert tree.in_order() == [33, 34]
+            assert len(tree) == 2
+            assert tree.pop_max() == (34, "Bob")
+            assert tree.pop_max() == (33, "Ann")
+            assert tree.is_empty()
+        with pytest.raises(AssertionError):
+            self.new.pop_min()
+        with pytest.raises(AssertionError):
+            self.empty.pop_max()
+
+    def test_union(self):
+        other = self.tree_class.from_pairs([(30, "Eve"), (33, "Max")])
+        union = self.linear.union(other)
+        assert type(union) is self.tree_class
+        assert union.in_order() == [30, 31, 32, 33, 34, 35]
+        assert union.value(33) == "Max"
+        assert len(union) == 6
+        assert union.height() == 3
+        assert self.linear.value(33) == "Ann"
+        assert other.union(self.balanced).value(33) == "Ann"
+        assert self.new.union(self.empty).is_empty()
+        assert self.root.union(self.new).in_order() == [35]
+
+    def test_intersection_and_difference(self):
+        other = self.tree_class.from_pairs([(30, "Eve"), (33, "Max")])
+        for tree in [self.linear, self.balanced]:
+            assert tree.intersection(other).in_order() == [33]
+            assert tree.intersection(other).value(33) == "Ann"
+            assert other.intersection(tree).value(33) == "Max"
+            assert tree.difference(other).in_order() == [31, 32, 34, 35]
+            assert other.difference(tree).in_order() == [30]
+            assert tree.intersection(self.new).is_empty()
+            assert tree.difference(self.new).in_order() == self.houses
+        # Check both ways of computing them, with trees of different sizes.
+        big = self.tree_class.from_sorted([(n, n) for n in range(0, 1000, 2)])
+        small = self.tree_class.from_sorted([(n, n) for n in range(0, 10, 3)])
+        assert big.intersection(small).in_order() == [0, 6]
+        assert small.intersection(big).in_order() == [0, 6]
+        assert small.difference(big).in_order() == [3, 9]
+        assert len(big.difference(small)) == 498
+
+    def test_intersection_and_difference_with_linear_tree(self):
+        # Count the key comparisons, to check the operations take linear time
+        # even if the bigger tree is linear, i.e. unbalanced.
+        comparisons = [0]
+
+        class Key(int):
+            def __lt__(self, other):
+                comparisons[0] += 1
+                return int(self) < int(other)
+
+        n = 2000
+        big = self.tree_class()
+        for key in range(n):
+            big.add(Key(key), key)
+        small = self.tree_class.from_sorted([(Key(k), k) for k in range(0, n, 20)])
+        comparisons[0] = 0
+        assert small.intersection(big).in_order() == list(range(0, n, 20))
+        assert small.difference(big).is_empty()
+        assert big.intersection(small).in_order() == list(range(0, n, 20))
+        assert len(big.difference(small)) == n - n // 20
+        # Each of the 4 operations does at most 2 comparisons per key.
+        assert comparisons[0] <= 4 * 2 * (n + n // 20)
+
+    def test_split_and_join(self):
+        for tree in [self.linear, self.balanced]:
+            larger = tree.split(33)
+            assert type(larger) is self.tree_class
+            assert tree.in_order() == [31, 32]
+            assert larger.in_order() == [33, 34, 35]
+            assert len(tree) == 2
+            assert len(larger) == 3
+            assert larger.split(40).is_empty()
+            tree.join(larger)
+            assert larger.is_empty()
+            assert tree.in_order() == self.houses
+            assert len(tree) == 5
+            assert tree.value(33) == "Ann"
+            larger = tree.split(0)
+            assert tree.is_empty()
+            assert larger.in_order() == self.houses
+            tree.join(larger)
+            assert tree.in_order() == self.houses
+        self.root.join(self.new)
+        assert self.root.in_order() == [35]
+        with pytest.raises(AssertionError):
+            self.root.join(self.tree_class.from_pairs([(34, "Ann")]))
+
     def test_remove_and_contains(self):
         # Get the middle key: it's the root of the balanced tree,
         # and doesn't exist in the single-node tree.
@@ -112,3 +351,118 @@ class TestBST:
         self.houses.pop(index)
         self.people.pop(index)
         self.test_value()
+
+    def test_deep_tree(self):
+        # Adding keys in ascending order to an unbalanced tree makes it
+        # deeper than the recursion limit. No method should exceed it.
+        n = sys.getrecursionlimit() + 1000
+        tree = self.tree_class()
+        for key in range(n):
+            tree.add(key, str(key))
+        assert tree.height() <= n
+        assert tree.smallest_key() == 0
+        assert tree.value(n - 1) == str(n - 1)
+        assert tree.in_order() == list(range(n))
+        assert sorted(tree.pre_order()) == list(range(n))
+        assert sorted(tree.post_order()) == list(range(n))
+        for key in range(n):
+            tree.remove(key)
+        assert tree.is_empty()
+
+
+class TestBalancedSearchTree(TestBST):
+    # Run all the BST tests on balanced trees, except for those that
+    # depend on the shape of the tree.
+    tree_class = BalancedSearchTree
+
+    def test_height(self):
+        assert self.new.height() == 0
+        assert self.empty.height() == 0
+        assert self.root.height() == 1
+        # Adding the keys in ascending order doesn't make the tree linear.
+        assert self.linear.height() == 3
+        assert self.balanced.height() == 3
+
+    def test_post_order(self):
+        assert self.new.post_order() == []
+        assert self.empty.post_order() == []
+        assert self.root.post_order() == [self.houses[-1]]
+        assert self.linear.post_order() == [31, 33, 35, 34, 32]
+        assert self.balanced.post_order() == [31, 33, 32, 35, 34]
+
+    def test_height_bound(self):
+        # An AVL tree with n nodes has height less than 1.44 log2(n + 2).
+        n = 2**14
+        tree = self.tree_class()
+        for key in range(n):
+            tree.add(key, str(key))
+        assert tree.height() < 1.44 * math.log2(n + 2)
+        assert tree.in_order() == list(range(n))
+        # Removing the smallest keys mustn't unbalance the tree either.
+        for key in range(n // 2):
+            tree.remove(key)
+        assert tree.height() < 1.44 * math.log2(n // 2 + 2)
+        assert tree.in_order() == list(range(n // 2, n))
+
+    def test_split_and_join_balance(self):
+        n = 2**12
+        tree = self.tree_class.from_sorted([(key, key) for key in range(n)])
+        # Splitting and joining at every key keeps the tree balanced.
+        for key in range(0, n, 7):
+            larger = tree.split(key)
+            assert tree.height() < 1.44 * math.log2(len(tree) + 2)
+            assert larger.height() < 1.44 * math.log2(len(larger) + 2)
+            tree.join(larger)
+            assert tree.height() < 1.44 * math.log2(n + 2)
+        assert tree.in_order() == list(range(n))
+        # Join trees of very different heights.
+        small = self.tree_class.from_sorted([(-1, -1)])
+        small.join(tree)
+        assert small.height() < 1.44 * math.log2(n + 3)
+        assert small.rank(0) == 1
+
+
+class TestPersistentSearchTree(TestBalancedSearchTree):
+    tree_class = PersistentSearchTree
+
+    def test_snapshot(self):
+        snapshot = self.balanced.snapshot()
+        assert type(snapshot) is PersistentSearchTree
+        assert snapshot.in_order() == self.houses
+        # Changing the tree doesn't change the snapshot.
+        self.balanced.add(33, "Max")
+        self.balanced.add(36, "Eve")
+        self.balanced.remove(34)
+        self.balanced.pop_min()
+        larger = self.balanced.split(35)
+        assert self.balanced.in_order() == [32, 33]
+        assert self.balanced.value(33) == "Max"
+        assert snapshot.in_order() == self.houses
+        assert snapshot.pre_order() == [34, 32, 31, 33, 35]
+        assert snapshot.value(33) == "Ann"
+        assert len(snapshot) == 5
+        # Changing the snapshot doesn't change the tree.
+        snapshot.remove(32)
+        assert snapshot.pop_max() == (35, "John")
+        snapshot.join(larger)
+        assert snapshot.in_order() == [31, 33, 34, 35, 36]
+        assert self.balanced.in_order() == [32, 33]
+
+    def test_snapshot_history(self):
+        # Keep a snapshot after each change and check none changes later.
+        tree = PersistentSearchTree()
+        snapshots = []
+        for key in range(100):
+            tree.add(key * 7 % 100, key)
+            snapshots.append(tree.snapshot())
+        for key in range(0, 100, 3):
+            tree.remove(key)
+            snapshots.append(tree.snapshot())
+        for index, snapshot in enumerate(snapshots[:100]):
+            keys = sorted(key * 7 % 100 for key in range(index + 1))
+            assert snapshot.in_order() == keys
+        for index, snapshot in enumerate(snapshots[100:]):
+            removed = range(0, 3 * index + 1, 3)
+            keys = [key for key in range(100) if key not in removed]
+            assert snapshot.in_order() == keys
+            assert len(snapshot) == len(keys)
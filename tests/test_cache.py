@@ -0,0 +1,134 @@
+"""Unit tests for the Cache class."""
+
+import random
+import unittest
+
+from lib.cache import Cache
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        # The clock is under the control of the tests.
+        self.time = 0
+        self.caches = dict()
+        for policy in ["lru", "lfu", "fifo"]:
+            cache = Cache(3, policy, clock=lambda: self.time)
+            for key in "abc":
+                cache.put(key, key.upper())
+            self.caches[policy] = cache
+
+    def test_get_and_put(self):
+        for cache in self.caches.values():
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(cache.get("a"), "A")
+            self.assertEqual(cache.get("d"), None)
+            cache.put("a", "AA")
+            self.assertEqual(cache.get("a"), "AA")
+            self.assertEqual(len(cache), 3)
+            self.assertTrue("b" in cache)
+            self.assertFalse("d" in cache)
+            cache.remove("b")
+            cache.remove("d")
+            self.assertFalse("b" in cache)
+            self.assertEqual(len(cache), 2)
+
+    def test_lru(self):
+        cache = self.caches["lru"]
+        cache.get("a")
+        cache.put("d", "D")
+        self.assertFalse("b" in cache)
+        cache.put("c", "CC")
+        cache.put("e", "E")
+        self.assertFalse("a" in cache)
+        self.assertEqual([key for key in "abcde" if key in cache], list("cde"))
+
+    def test_lfu(self):
+        cache = self.caches["lfu"]
+        for key in "aabbc":
+            cache.get(key)
+        # c has fewest uses.
+        cache.put("d", "D")
+        self.assertFalse("c" in cache)
+        # d has fewest uses.
+        cache.put("e", "E")
+        self.assertFalse("d" in cache)
+        # a, b and e have 3 uses, but a got them first.
+        cache.get("e")
+        cache.get("e")
+        cache.put("f", "F")
+        self.assertFalse("a" in cache)
+        # After removing f, the items with fewest uses are found again.
+        cache.remove("f")
+        cache.put("g", "G")
+        cache.put("h", "H")
+        self.assertFalse("g" in cache)
+        self.assertTrue("b" in cache and "e" in cache and "h" in cache)
+
+    def test_fifo(self):
+        cache = self.caches["fifo"]
+        cache.get("a")
+        cache.put("a", "AA")
+        cache.put("d", "D")
+        self.assertFalse("a" in cache)
+        cache.put("e", "E")
+        self.assertFalse("b" in cache)
+
+    def test_time_to_live(self):
+        cache = Cache(3, time_to_live=10, clock=lambda: self.time)
+        cache.put("a", "A")
+        cache.put("b", "B", time_to_live=20)
+        self.time = 10
+        self.assertFalse("a" in cache)
+        self.assertTrue("b" in cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(len(cache), 1)
+        # Replacing a value resets its time to live.
+        cache.put("b", "BB")
+        self.time = 19
+        self.assertEqual(cache.get("b"), "BB")
+        self.time = 20
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.stats()["expirations"], 2)
+
+    def test_stats(self):
+        cache = self.caches["lru"]
+        for key in "abxd":
+            cache.get(key)
+        cache.put("d", "D")
+        cache.put("e", "E")
+        self.assertEqual(
+            cache.stats(),
+            dict(
+                items=3,
+                capacity=3,
+                hits=2,
+                misses=2,
+                evictions=2,
+                expirations=0,
+            ),
+        )
+
+    def test_random(self):
+        # Compare with a simple LRU cache that uses a list.
+        random.seed(269)
+        cache = Cache(20)
+        keys = []
+        for value in range(5000):
+            key = random.randrange(40)
+            if random.random() < 0.5:
+                if key in keys:
+                    keys.remove(key)
+                    keys.append(key)
+                    self.assertEqual(cache.get(key) is not None, True)
+                else:
+                    self.assertEqual(cache.get(key), None)
+            else:
+                if key in keys:
+                    keys.remove(key)
+                elif len(keys) == 20:
+                    keys.pop(0)
+                keys.append(key)
+                cache.put(key, value)
+            in_cache = [key for key in range(40) if key in cache]
+            self.assertEqual(sorted(keys), in_cache)
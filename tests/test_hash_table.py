@@ -1,11 +1,20 @@
 """Unit tests for binary search tables."""
 
+import random
 import unittest
 
-from lib.hash_table import HashTable
+from lib.hash_table import (
+    BaseHashTable,
+    ChainedHashTable,
+    HashTable,
+    RobinHoodHashTable,
+    mixed_hash,
+)
 
 
 class TestHashTable(unittest.TestCase):
+    table_class = HashTable
+
     def setUp(self):
         # The keys are unique house numbers in a street.
         # The values are the names of inhabitants.
@@ -13,20 +22,20 @@ class TestHashTable(unittest.TestCase):
         self.people = ["Jane", "John", "Ann", "Bob", "John"]
         # Create tables for the tests to use.
         # A brand new table.
-        self.new = HashTable(5)
+        self.new = self.table_class(5)
         # An empty table. Tests removal of single entry.
-        self.empty = HashTable(5)
+        self.empty = self.table_class(5)
         self.empty.add(self.houses[0], self.people[0])
         self.empty.remove(self.houses[0])
         # A table with a single entry, with highest key.
-        self.single = HashTable(5)
+        self.single = self.table_class(5)
         self.single.add(self.houses[-1], self.people[-1])
         # A table with keys added in ascending order.
-        self.ascending = HashTable(5)
+        self.ascending = self.table_class(5)
         for house, person in zip(self.houses, self.people):
             self.ascending.add(house, person)
         # A table with keys added in descending order.
-        self.descending = HashTable(5)
+        self.descending = self.table_class(5)
         for house, person in zip(reversed(self.houses), reversed(self.people)):
             self.descending.add(house, person)
 
@@ -95,8 +104,332 @@ class TestHashTable(unittest.TestCase):
             self.assertEqual(self.ascending.value(key), value)
 
     def test_capacity(self):
+        # The table is full.
+        self.assertEqual(self.ascending.add(30, "me"), False)
+        # The bucket of a removed entry can be reused.
+        self.ascending.remove(33)
+        self.assertEqual(self.ascending.add(30, "me"), True)
+        self.assertEqual(self.ascending.add(33, "Ann"), False)
         # Remove all entries.
-        for key in self.houses:
+        for key in self.houses + [30]:
             self.ascending.remove(key)
-        # Try to add a new one.
+        # Add new ones.
+        for key in range(36, 41):
+            self.assertEqual(self.ascending.add(key, "me"), True)
         self.assertEqual(self.ascending.add(30, "me"), False)
+        self.assertEqual(len(self.ascending), 5)
+
+    def test_compact(self):
+        table = HashTable(100)
+        for key in range(50):
+            table.add(key, str(key))
+        # Removing a quarter of the buckets triggers the compaction.
+        for key in range(25):
+            table.remove(key)
+        self.assertEqual(table._deleted, 25)
+        table.remove(25)
+        self.assertEqual(table._deleted, 0)
+        table.remove(26)
+        table.compact()
+        self.assertEqual(table._deleted, 0)
+        self.assertEqual(len(table), 23)
+        for key in range(50):
+            self.assertEqual(table.value(key), str(key) if key > 26 else None)
+
+    def test_growth(self):
+        table = self.table_class(2, max_load_factor=0.5)
+        for key in range(100):
+            self.assertEqual(table.add(key, str(key)), True)
+        self.assertEqual(len(table), 100)
+        self.assertEqual(table.stats()["buckets"], 256)
+        for key in range(100):
+            self.assertEqual(table.value(key), str(key))
+        # Growing discards the deleted items.
+        table.remove(0)
+        for key in range(100, 130):
+            table.add(key, str(key))
+        self.assertEqual(table.stats()["buckets"], 512)
+        self.assertEqual(table.stats()["deleted"], 0)
+        self.assertEqual(table.value(0), None)
+        self.assertEqual(table.value(127), "127")
+
+    def test_shrink(self):
+        table = self.table_class(4, max_load_factor=0.5, min_load_factor=0.2)
+        for key in range(100):
+            table.add(key, str(key))
+        for key in range(90):
+            table.remove(key)
+        self.assertEqual(len(table), 10)
+        self.assertEqual(table.stats()["buckets"], 32)
+        for key in range(90, 100):
+            self.assertEqual(table.value(key), str(key))
+        # The table never has fewer buckets than initially.
+        for key in range(90, 100):
+            table.remove(key)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.stats()["buckets"], 4)
+
+    def test_stats(self):
+        stats = self.new.stats()
+        self.assertEqual(stats["items"], 0)
+        self.assertEqual(stats["load_factor"], 0)
+        self.assertEqual(stats["average_probes"], 0)
+        self.assertEqual(stats["clusters"], dict())
+        # The keys 31 to 35 are in consecutive buckets.
+        stats = self.ascending.stats()
+        self.assertEqual(stats["items"], 5)
+        self.assertEqual(stats["load_factor"], 1)
+        self.assertEqual(stats["maximum_probes"], 1)
+        self.assertEqual(stats["clusters"], {5: 1})
+        table = HashTable(10)
+        for key in [1, 11, 21, 5, 9]:
+            table.add(key, str(key))
+        table.remove(5)
+        stats = table.stats()
+        self.assertEqual(stats["items"], 4)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(stats["deleted_ratio"], 0.1)
+        self.assertEqual(stats["average_probes"], (1 + 2 + 3 + 1) / 4)
+        self.assertEqual(stats["maximum_probes"], 3)
+        self.assertEqual(stats["clusters"], {3: 1, 1: 2})
+        self.assertEqual(len(table), 4)
+        # A cluster can wrap around the end of the buckets.
+        table.add(19, "19")
+        stats = table.stats()
+        self.assertEqual(stats["maximum_probes"], 3)
+        self.assertEqual(stats["clusters"], {5: 1, 1: 1})
+
+    def test_batches(self):
+        # Compare each batch method with the loop it replaces.
+        pairs = [(key % 7, key) for key in range(10)] + [(8, None), (9, "x")]
+        for arguments in [(5,), (8,), (2, 0.5, 0.2)]:
+            table = self.table_class(*arguments)
+            expected = self.table_class(*arguments)
+            self.assertEqual(
+                table.add_many(iter(pairs)),
+                [expected.add(key, value) for key, value in pairs],
+            )
+            self.assertEqual(len(table), len(expected))
+            self.assertEqual(
+                table.values_of(range(10)),
+                [expected.value(key) for key in range(10)],
+            )
+            table.remove_many([0, 1, 2, 10])
+            for key in [0, 1, 2, 10]:
+                expected.remove(key)
+            self.assertEqual(len(table), len(expected))
+            self.assertEqual(
+                table.values_of(range(10)),
+                [expected.value(key) for key in range(10)],
+            )
+        self.assertEqual(self.new.values_of([]), [])
+
+    def test_batch_resizing(self):
+        table = self.table_class(2, max_load_factor=0.5, min_load_factor=0.2)
+        table.add_many((key, key) for key in range(1000))
+        self.assertEqual(table.stats()["buckets"], 2048)
+        table.remove_many(range(1, 1000))
+        self.assertEqual(table.stats()["buckets"], 4)
+        self.assertEqual(table.values_of([0, 1]), [0, None])
+
+    def test_iterators(self):
+        for table in [self.new, self.empty]:
+            self.assertEqual(list(table.keys()), [])
+            self.assertEqual(list(table.items()), [])
+        self.ascending.remove(33)
+        pairs = list(zip(self.houses, self.people))
+        pairs.pop(2)
+        self.assertEqual(sorted(self.ascending.items()), pairs)
+        self.assertEqual(sorted(self.ascending.keys()), [31, 32, 34, 35])
+        self.assertEqual(sorted(self.ascending), [31, 32, 34, 35])
+        self.assertEqual(
+            list(self.ascending.values()),
+            [self.ascending[key] for key in self.ascending.keys()],
+        )
+
+    def test_dictionary_protocol(self):
+        self.assertEqual(self.single[35], "John")
+        with self.assertRaises(KeyError):
+            self.single[34]
+        self.single[34] = "Bob"
+        self.assertEqual(self.single[34], "Bob")
+        del self.single[35]
+        self.assertFalse(35 in self.single)
+        with self.assertRaises(KeyError):
+            del self.single[35]
+        self.assertEqual(len(self.single), 1)
+
+    def test_copy_and_update(self):
+        table = self.ascending.copy()
+        self.assertEqual(type(table), self.table_class)
+        table.remove(31)
+        table[32] = "Max"
+        self.assertEqual(self.ascending[31], "Jane")
+        self.assertEqual(self.ascending[32], "John")
+        self.assertEqual(len(self.ascending), 5)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.stats(), table.copy().stats())
+        # Update from a table, a dictionary and a list of pairs.
+        self.new.update(table)
+        self.assertEqual(sorted(self.new.items()), sorted(table.items()))
+        self.new.update({31: "Eve", 32: "Tom"})
+        self.new.update([(33, "Sue")])
+        self.assertEqual(self.new.values_of([31, 32, 33]), ["Eve", "Tom", "Sue"])
+
+    def test_probing(self):
+        # Do the same random changes to tables and to a dictionary.
+        random.seed(269)
+        tables = [
+            HashTable(64, probing="quadratic"),
+            HashTable(64, probing="double"),
+            HashTable(8, 0.75, 0.25, probing="quadratic"),
+            HashTable(8, 0.75, 0.25, probing="double"),
+            self.table_class(64),
+            self.table_class(8, 0.75, 0.25),
+        ]
+        for table in tables:
+            dictionary = dict()
+            for value in range(2000):
+                key = random.randrange(100) * 64
+                if random.random() < 0.4:
+                    table.remove(key)
+                    dictionary.pop(key, None)
+                elif len(dictionary) < 60 or key in dictionary:
+                    self.assertEqual(table.add(key, value), True)
+                    dictionary[key] = value
+                self.assertEqual(len(table), len(dictionary))
+            for key in range(0, 100 * 64, 32):
+                self.assertEqual(table.value(key), dictionary.get(key))
+
+    def test_full_table(self):
+        # Quadratic probing and double hashing try all buckets.
+        for probing in ["quadratic", "double"]:
+            table = HashTable(8, probing=probing)
+            for key in range(0, 64, 8):
+                self.assertEqual(table.add(key, "x"), True)
+            self.assertEqual(table.add(64, "x"), False)
+            for key in range(0, 64, 8):
+                self.assertEqual(table.value(key), "x")
+            self.assertEqual(table.value(64), None)
+
+    def test_hash_function(self):
+        # Equal hashes only make the table slower.
+        table = self.table_class(8, hash_function=lambda key: 0)
+        for key in range(6):
+            table.add(key, str(key))
+        self.assertEqual(table.stats()["maximum_probes"], 6)
+        table.remove(2)
+        for key in range(6):
+            self.assertEqual(table.value(key), None if key == 2 else str(key))
+        # With the built-in hash, multiples of the number of buckets
+        # have the same first bucket. Mixing spreads them out.
+        strided = self.table_class(64, 0.5)
+        mixed = self.table_class(64, 0.5, hash_function=mixed_hash)
+        for key in range(0, 32 * 1024, 1024):
+            strided.add(key, key)
+            mixed.add(key, key)
+        self.assertEqual(strided.stats()["maximum_probes"], 32)
+        self.assertLess(mixed.stats()["maximum_probes"], 8)
+        self.assertEqual(sorted(mixed.items()), sorted(strided.items()))
+        self.assertEqual(mixed_hash(1024), mixed_hash(1024))
+        self.assertEqual(mixed_hash(-1) >= 0, True)
+
+
+class TestRobinHoodHashTable(TestHashTable):
+    table_class = RobinHoodHashTable
+
+    def test_compact(self):
+        # Removing an item moves the following items back,
+        # so a table never has deleted items.
+        table = RobinHoodHashTable(10)
+        for key in [1, 11, 21, 2, 3]:
+            table.add(key, str(key))
+        table.remove(11)
+        self.assertEqual(table.stats()["deleted"], 0)
+        self.assertEqual(table.stats()["clusters"], {4: 1})
+        for key in [1, 21, 2, 3]:
+            self.assertEqual(table.value(key), str(key))
+        table.compact()
+        self.assertEqual(len(table), 4)
+
+    def test_stats(self):
+        # Robin Hood hashing moves key 2 forward to let 21 be closer
+        # to its hash bucket, evening out the probes.
+        table = RobinHoodHashTable(10)
+        for key in [1, 2, 11, 21]:
+            table.add(key, str(key))
+        stats = table.stats()
+        self.assertEqual(stats["items"], 4)
+        self.assertEqual(stats["deleted"], 0)
+        self.assertEqual(stats["average_probes"], (1 + 2 + 3 + 3) / 4)
+        self.assertEqual(stats["maximum_probes"], 3)
+        self.assertEqual(stats["clusters"], {4: 1})
+
+
+class TestChainedHashTable(TestHashTable):
+    table_class = ChainedHashTable
+
+    def test_capacity(self):
+        # The table is never full: the load factor can exceed 1.
+        self.assertEqual(self.ascending.add(30, "me"), True)
+        for key in range(36, 56):
+            self.assertEqual(self.ascending.add(key, "me"), True)
+        self.assertEqual(len(self.ascending), 26)
+        self.assertEqual(self.ascending.stats()["buckets"], 5)
+        self.assertEqual(self.ascending.stats()["load_factor"], 26 / 5)
+        for key in range(30, 56):
+            self.assertEqual(self.ascending.value(key) is not None, True)
+
+    def test_compact(self):
+        # Removing an item removes it from its chain,
+        # so a table never has deleted items.
+        table = ChainedHashTable(10)
+        for key in [1, 11, 21, 2, 3]:
+            table.add(key, str(key))
+        table.remove(11)
+        self.assertEqual(table.stats()["deleted"], 0)
+        self.assertEqual(table.stats()["clusters"], {2: 1, 1: 2})
+        table.remove(2)
+        self.assertEqual(table.stats()["clusters"], {2: 1, 1: 1})
+        for key in [1, 21, 3]:
+            self.assertEqual(table.value(key), str(key))
+        table.compact()
+        self.assertEqual(len(table), 3)
+
+    def test_stats(self):
+        # The keys 31 to 35 are in different buckets.
+        stats = self.ascending.stats()
+        self.assertEqual(stats["items"], 5)
+        self.assertEqual(stats["load_factor"], 1)
+        self.assertEqual(stats["average_probes"], 1)
+        self.assertEqual(stats["clusters"], {1: 5})
+        self.assertEqual(self.new.stats()["clusters"], dict())
+        table = ChainedHashTable(10)
+        for key in [1, 11, 21, 5]:
+            table.add(key, str(key))
+        stats = table.stats()
+        self.assertEqual(stats["average_probes"], (1 + 2 + 3 + 1) / 4)
+        self.assertEqual(stats["maximum_probes"], 3)
+        self.assertEqual(stats["clusters"], {3: 1, 1: 1})
+
+    def test_chain_length(self):
+        # A long chain doubles the buckets once there are enough items.
+        table = ChainedHashTable(4, max_chain_length=2)
+        for key in [0, 4, 8]:
+            table.add(key, str(key))
+        self.assertEqual(table.stats()["buckets"], 4)
+        table.add(12, "12")
+        self.assertEqual(table.stats()["buckets"], 8)
+        self.assertEqual(table.stats()["maximum_probes"], 2)
+        for key in [0, 4, 8, 12]:
+            self.assertEqual(table.value(key), str(key))
+
+    def test_base_class(self):
+        # A chained table has none of the closed hash table's internals.
+        self.assertEqual(isinstance(self.new, BaseHashTable), True)
+        self.assertEqual(isinstance(self.new, HashTable), False)
+        for name in ["_keys", "_probing", "_first_probe", "_place"]:
+            self.assertEqual(hasattr(self.new, name), False)
+        # The base class is abstract.
+        with self.assertRaises(TypeError):
+            BaseHashTable(8)
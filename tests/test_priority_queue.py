@@ -0,0 +1,209 @@
+"""Unit tests for the PriorityQueue class."""
+
+import random
+import unittest
+
+from lib.priority_queue import PriorityQueue
+
+
+class TestPriorityQueue(unittest.TestCase):
+    arity = 2
+    stable = False
+
+    def setUp(self):
+        # Create queues for the tests to use.
+        self.new = PriorityQueue(arity=self.arity, stable=self.stable)
+        self.empty = PriorityQueue(arity=self.arity, stable=self.stable)
+        self.empty.enqueue("hi", 1)
+        self.empty.dequeue()
+        # Don't add in ascending or descending order.
+        self.non_empty = PriorityQueue(arity=self.arity, stable=self.stable)
+        for item, priority in [("b", 2), ("d", 4), ("a", 1), ("c", 3)]:
+            self.non_empty.enqueue(item, priority)
+        # A queue created from priority-item pairs.
+        pairs = [[3, "c"], [1, "a"], [2, "b"]]
+        self.from_pairs = PriorityQueue(pairs, self.arity, self.stable)
+
+    def dequeue_all(self, queue):
+        # Return the items in the order they're dequeued.
+        items = []
+        while not queue.is_empty():
+            items.append(queue.dequeue())
+        return items
+
+    def test_size(self):
+        self.assertEqual(self.new.size(), 0)
+        self.assertEqual(self.empty.size(), 0)
+        self.assertEqual(self.non_empty.size(), 4)
+        self.assertEqual(self.from_pairs.size(), 3)
+
+    def test_order(self):
+        self.assertEqual(self.non_empty.front(), "a")
+        self.assertEqual(self.dequeue_all(self.non_empty), list("abcd"))
+        self.assertEqual(self.dequeue_all(self.from_pairs), list("abc"))
+
+    def test_contains(self):
+        self.assertFalse("hi" in self.empty)
+        self.assertTrue("c" in self.from_pairs)
+        self.assertTrue("d" in self.non_empty)
+        self.non_empty.dequeue()
+        self.assertFalse("a" in self.non_empty)
+        self.assertTrue("b" in self.non_empty)
+
+    def test_set_priority(self):
+        self.non_empty.set_priority("d", 0)
+        self.non_empty.set_priority("a", 5)
+        self.non_empty.set_priority("e", 1)
+        self.assertFalse("e" in self.non_empty)
+        self.assertEqual(self.dequeue_all(self.non_empty), list("dbca"))
+
+    def test_remove(self):
+        self.non_empty.remove("a")
+        self.non_empty.remove("c")
+        self.non_empty.remove("e")
+        self.assertFalse("c" in self.non_empty)
+        self.assertEqual(self.non_empty.size(), 2)
+        self.assertEqual(self.dequeue_all(self.non_empty), list("bd"))
+        self.from_pairs.remove("c")
+        self.assertEqual(self.dequeue_all(self.from_pairs), list("ab"))
+
+    def test_random(self):
+        # Do the same random changes to a queue and to a dictionary.
+        random.seed(269)
+        queue = PriorityQueue(arity=self.arity, stable=self.stable)
+        priorities = dict()
+        for _ in range(2000):
+            item = random.randrange(50)
+            priority = random.randrange(100)
+            choice = random.random()
+            if item in priorities and choice < 0.3:
+                queue.remove(item)
+                del priorities[item]
+            elif item in priorities:
+                queue.set_priority(item, priority)
+                priorities[item] = priority
+            elif choice < 0.8:
+                queue.enqueue(item, priority)
+                priorities[item] = priority
+            elif priorities:
+                smallest = min(priorities.values())
+                item = queue.dequeue()
+                self.assertEqual(priorities.pop(item), smallest)
+            self.assertEqual(queue.size(), len(priorities))
+            for item in range(50):
+                self.assertEqual(item in queue, item in priorities)
+
+    def test_heapify(self):
+        # Check the heap property, for every size up to a few levels.
+        for size in range(30):
+            pairs = [[(7 * item) % 11, item] for item in range(size)]
+            queue = PriorityQueue(pairs, self.arity, self.stable)
+            items = self.dequeue_all(queue)
+            self.assertEqual(sorted(items), list(range(size)))
+            priorities = [(7 * item) % 11 for item in items]
+            self.assertEqual(priorities, sorted(priorities))
+
+    def test_enqueue_many(self):
+        # A small batch is enqueued, a large one is heapified.
+        self.non_empty.enqueue_many([[0, "z"]])
+        pairs = [(4.5 - item, str(item)) for item in range(5)]
+        self.non_empty.enqueue_many(iter(pairs))
+        self.assertTrue("3" in self.non_empty)
+        self.assertEqual(self.non_empty.size(), 10)
+        self.assertEqual(
+            self.dequeue_all(self.non_empty),
+            ["z", "4", "a", "3", "b", "2", "c", "1", "d", "0"],
+        )
+        self.new.enqueue_many([])
+        self.assertTrue(self.new.is_empty())
+
+    def test_dequeue_many_and_nsmallest(self):
+        self.assertEqual(self.non_empty.nsmallest(0), [])
+        self.assertEqual(self.non_empty.nsmallest(3), list("abc"))
+        self.assertEqual(self.non_empty.size(), 4)
+        self.assertEqual(self.non_empty.dequeue_many(3), list("abc"))
+        self.assertEqual(self.non_empty.nsmallest(1), ["d"])
+        self.assertEqual(self.non_empty.dequeue_many(1), ["d"])
+        self.assertEqual(self.new.dequeue_many(0), [])
+        queue = PriorityQueue(arity=self.arity, stable=self.stable)
+        queue.enqueue_many([[item % 7, item] for item in range(30)])
+        expected = sorted(range(30), key=lambda item: item % 7)
+        smallest = [item % 7 for item in queue.nsmallest(9)]
+        self.assertEqual(smallest, [item % 7 for item in expected[:9]])
+
+    def test_pushpop_and_replace(self):
+        self.assertEqual(self.new.pushpop("a", 1), "a")
+        self.assertTrue(self.new.is_empty())
+        self.assertEqual(self.non_empty.pushpop("z", 0), "z")
+        self.assertEqual(self.non_empty.pushpop("e", 5), "a")
+        self.assertTrue("e" in self.non_empty)
+        self.assertFalse("a" in self.non_empty)
+        self.assertEqual(self.non_empty.replace("a", 1), "b")
+        self.assertFalse("b" in self.non_empty)
+        self.assertEqual(self.non_empty.replace("f", 6), "a")
+        self.assertEqual(self.dequeue_all(self.non_empty), list("cdef"))
+
+
+class TestTernaryPriorityQueue(TestPriorityQueue):
+    arity = 3
+
+
+class TestOctonaryPriorityQueue(TestPriorityQueue):
+    arity = 8
+
+
+class TestStablePriorityQueue(TestPriorityQueue):
+    stable = True
+
+    def test_ties(self):
+        # Items with the same priority are removed first in, first out.
+        self.non_empty.enqueue_many([[2, "b2"], [1, "a2"]])
+        self.non_empty.enqueue("b3", 2)
+        self.non_empty.set_priority("c", 2)
+        first = ["a", "a2", "b", "c", "b2"]
+        self.assertEqual(self.non_empty.nsmallest(5), first)
+        self.assertEqual(self.non_empty.pushpop("a3", 1), "a")
+        self.assertEqual(self.non_empty.replace("z", 2), "a2")
+        rest = ["a3", "b", "c", "b2", "b3", "z", "d"]
+        self.assertEqual(self.dequeue_all(self.non_empty), rest)
+        queue = PriorityQueue([[0, item] for item in range(20)], stable=True)
+        self.assertEqual(self.dequeue_all(queue), list(range(20)))
+
+    def test_random_ties(self):
+        # Compare with sorting by priority, which is stable.
+        random.seed(269)
+        for arity in [2, 3, 4]:
+            queue = PriorityQueue(arity=arity, stable=True)
+            pairs = [[random.randrange(5), item] for item in range(200)]
+            # Add some pairs one by one and heapify the others.
+            for priority, item in pairs[:50]:
+                queue.enqueue(item, priority)
+            queue.enqueue_many(pairs[50:])
+            expected = [item for _, item in sorted(pairs, key=lambda p: p[0])]
+            self.assertEqual(queue.nsmallest(50), expected[:50])
+            self.assertEqual(self.dequeue_all(queue), expected)
+
+    def test_comparisons(self):
+        # A stable queue compares priorities as often as an unstable one.
+        comparisons = [0]
+
+        class Priority(int):
+            def __lt__(self, other):
+                comparisons[0] += 1
+                return int(self) < int(other)
+
+        def count(priorities, stable):
+            # Return the comparisons to enqueue and dequeue all priorities.
+            comparisons[0] = 0
+            queue = PriorityQueue(arity=self.arity, stable=stable)
+            for item, priority in enumerate(priorities):
+                queue.enqueue(item, priority)
+            self.dequeue_all(queue)
+            return comparisons[0]
+
+        random.seed(269)
+        distinct = [Priority(n) for n in random.sample(range(10**6), 2000)]
+        self.assertEqual(count(distinct, True), count(distinct, False))
+        # With ties, the nodes move differently, so the counts differ a bit.
+        ties = [Priority(random.randrange(20)) for _ in range(2000)]
+        self.assertLessEqual(count(ties, True), 1.05 * count(ties, False))
@@ -40,6 +40,11 @@ class TestSort(unittest.TestCase):
             self.assertEqual(quick_sorted(example), expected)
             self.assertEqual(heap_sorted(example), expected)
 
+    def test_heap_sorted_unhashable(self):
+        # Lists are comparable but can't be dictionary keys.
+        example = [[3, 1], [1, 2], [2], [1, 2]]
+        self.assertEqual(heap_sorted(example), sorted(example))
+
     # The examples are set up anew before each test. Hence each algorithm
     # can modify each list without affecting other tests.
 